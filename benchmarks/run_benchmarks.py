@@ -0,0 +1,262 @@
+"""
+Headless speed benchmarks for the environment, pathfinding and agent.
+
+    python -m benchmarks.run_benchmarks                      # print a report
+    python -m benchmarks.run_benchmarks --save base.json     # record a baseline
+    python -m benchmarks.run_benchmarks --compare base.json  # flag regressions
+
+Every benchmark uses fixed seeds, so two runs on the same machine do the
+same work. Timings are per call; the report shows calls/sec and latency
+percentiles in microseconds.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+
+import numpy as np
+
+from env.mazes import generate_maze
+from env.pacman_env import PacmanEnv
+from env.pathfinding import a_star_path
+from search_agent import SearchRLAgent
+
+SEED = 0
+
+# Procedural board for the *_large benchmarks: ~10x the arcade maze's area
+LARGE_MAZE = (101, 61)
+
+
+def _summarize(durations, work=None):
+    """
+    Stats for a list of per-call durations (seconds).
+    `work` is the number of units done (e.g. env steps) if not one per call.
+    """
+    durations = np.asarray(durations)
+    total = float(durations.sum())
+    units = len(durations) if work is None else work
+    us = durations * 1e6
+    return {
+        "calls": len(durations),
+        "total_s": total,
+        "per_sec": units / total if total > 0 else float("inf"),
+        "p50_us": float(np.percentile(us, 50)),
+        "p90_us": float(np.percentile(us, 90)),
+        "p99_us": float(np.percentile(us, 99)),
+    }
+
+
+# -------------------------------
+# BENCHMARKS
+# -------------------------------
+def bench_env_reset(n=2000):
+    env = PacmanEnv(seed=SEED)
+    times = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        env.reset()
+        times.append(time.perf_counter() - t0)
+    return _summarize(times)
+
+
+def _large_layout():
+    width, height = LARGE_MAZE
+    return generate_maze(width, height, seed=SEED)
+
+
+def bench_env_step(n=20000, observe=True, num_ghosts=1, layout=None):
+    rng = np.random.default_rng(SEED)
+    env = PacmanEnv(seed=SEED, num_ghosts=num_ghosts, layout=layout)
+    env.reset()
+    # Shared per-layout tables are built on first use; keep that out of the timings
+    env.map.distance_oracle()
+    times = []
+    for _ in range(n):
+        valid = env.get_valid_actions()
+        action = valid[rng.integers(len(valid))]
+        t0 = time.perf_counter()
+        _, _, done, _ = env.step(action, observe=observe)
+        times.append(time.perf_counter() - t0)
+        if done:
+            env.reset()
+    return _summarize(times)
+
+
+def bench_env_step_no_obs(n=20000):
+    """step(observe=False), the path the training loops take."""
+    return bench_env_step(n, observe=False)
+
+
+def bench_env_step_large(n=2000):
+    """step(observe=False) with four ghosts on a generated LARGE_MAZE board."""
+    return bench_env_step(n, observe=False, num_ghosts=4, layout=_large_layout())
+
+
+def bench_get_observation(n=20000, obs_mode="grid"):
+    env = PacmanEnv(seed=SEED, obs_mode=obs_mode)
+    env.reset()
+    times = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        env.get_observation()
+        times.append(time.perf_counter() - t0)
+    return _summarize(times)
+
+
+def bench_obs_planes(n=20000):
+    return bench_get_observation(n, "planes")
+
+
+def bench_obs_egocentric(n=20000):
+    return bench_get_observation(n, "egocentric")
+
+
+def bench_a_star(n=2000, layout=None):
+    rng = np.random.default_rng(SEED)
+    env = PacmanEnv(seed=SEED, layout=layout)
+    env.reset()
+    open_cells = [(x, y)
+                  for y in range(env.map.height)
+                  for x in range(env.map.width)
+                  if not env.map.is_wall(x, y)]
+    picks = rng.integers(len(open_cells), size=(n, 2))
+    pairs = [(open_cells[a], open_cells[b]) for a, b in picks]
+
+    times = []
+    for start, goal in pairs:
+        t0 = time.perf_counter()
+        a_star_path(env.map, start, goal)
+        times.append(time.perf_counter() - t0)
+    return _summarize(times)
+
+
+def bench_a_star_large(n=200):
+    return bench_a_star(n, layout=_large_layout())
+
+
+def _bench_plan(high_action, n):
+    env = PacmanEnv(seed=SEED)
+    env.reset()
+    agent = SearchRLAgent(seed=SEED)
+    times = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        action = agent.plan_with_astar(env, high_action)
+        times.append(time.perf_counter() - t0)
+        _, _, done, _ = env.step(action)
+        if done:
+            env.reset()
+    return _summarize(times)
+
+
+def bench_plan_chase(n=5000):
+    return _bench_plan(0, n)
+
+
+def bench_plan_avoid(n=5000):
+    return _bench_plan(1, n)
+
+
+def bench_train_episodes(n=20):
+    """Full training episodes (act, plan, step, Q update); per_sec is episodes/sec."""
+    agent = SearchRLAgent(seed=SEED)
+    times = []
+    for ep in range(n):
+        t0 = time.perf_counter()
+        agent.train(num_episodes=1, verbose=False, seed=SEED + ep)
+        times.append(time.perf_counter() - t0)
+    return _summarize(times)
+
+
+BENCHMARKS = {
+    "env_reset": bench_env_reset,
+    "env_step": bench_env_step,
+    "env_step_no_obs": bench_env_step_no_obs,
+    "env_step_large": bench_env_step_large,
+    "get_observation": bench_get_observation,
+    "obs_planes": bench_obs_planes,
+    "obs_egocentric": bench_obs_egocentric,
+    "a_star_path": bench_a_star,
+    "a_star_large": bench_a_star_large,
+    "plan_chase": bench_plan_chase,
+    "plan_avoid": bench_plan_avoid,
+    "train_episode": bench_train_episodes,
+}
+
+
+# -------------------------------
+# REPORTING
+# -------------------------------
+def run_all(names=None):
+    results = {}
+    for name in names or BENCHMARKS:
+        results[name] = BENCHMARKS[name]()
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "seed": SEED,
+        },
+        "results": results,
+    }
+
+
+def print_report(report, baseline=None):
+    header = f"{'benchmark':<18}{'per_sec':>14}{'p50_us':>11}{'p90_us':>11}{'p99_us':>11}"
+    if baseline:
+        header += f"{'vs base':>10}"
+    print(header)
+    for name, stats in report["results"].items():
+        line = (f"{name:<18}{stats['per_sec']:>14.1f}{stats['p50_us']:>11.1f}"
+                f"{stats['p90_us']:>11.1f}{stats['p99_us']:>11.1f}")
+        base = (baseline or {}).get("results", {}).get(name)
+        if base:
+            line += f"{stats['per_sec'] / base['per_sec']:>9.2f}x"
+        print(line)
+
+
+def find_regressions(report, baseline, tolerance):
+    """Names whose throughput dropped more than `tolerance` (fraction) below the baseline."""
+    slow = []
+    for name, stats in report["results"].items():
+        base = baseline["results"].get(name)
+        if base and stats["per_sec"] < base["per_sec"] * (1.0 - tolerance):
+            slow.append(name)
+    return slow
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS),
+                        help="run only these benchmarks")
+    parser.add_argument("--save", metavar="PATH", help="write results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.20,
+                        help="allowed slowdown vs baseline before failing (default 0.20)")
+    args = parser.parse_args(argv)
+
+    report = run_all(args.only)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {args.save}")
+
+    if baseline:
+        slow = find_regressions(report, baseline, args.tolerance)
+        if slow:
+            print("Regressions:", ", ".join(slow))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
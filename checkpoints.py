@@ -0,0 +1,74 @@
+# checkpoints.py
+"""
+Training checkpoints: one self-contained .npz per checkpoint.
+
+A checkpoint holds named arrays (Q-values, rewards so far, replay
+buffer columns, ...) plus a JSON "state" record (episode counter,
+epsilon, RNG state, ...). It is written to a temp file and renamed into
+place, so a run killed mid-save leaves the previous checkpoint intact.
+Files are <directory>/ckpt_<episodes done>.npz; the newest few are kept.
+"""
+import glob
+import json
+import os
+
+import numpy as np
+
+from env.fileio import atomic_write
+
+FORMAT_NAME = "pacman-train-checkpoint"
+FORMAT_VERSION = 1
+
+# Key of the JSON state record inside the .npz
+_STATE_KEY = "__state__"
+
+
+def checkpoint_path(directory, episode):
+    return os.path.join(directory, f"ckpt_{episode:09d}.npz")
+
+
+def list_checkpoints(directory):
+    """Checkpoint files in directory, oldest first."""
+    return sorted(glob.glob(os.path.join(directory, "ckpt_*.npz")))
+
+
+def latest_checkpoint(directory):
+    """Path of the newest checkpoint in directory, or None if there is none."""
+    paths = list_checkpoints(directory)
+    return paths[-1] if paths else None
+
+
+def save_checkpoint(directory, episode, arrays, state, keep=3):
+    """
+    Atomically write arrays and the JSON-serializable state as the
+    checkpoint for `episode` episodes done, then delete all but the
+    newest `keep` checkpoints. Returns the path written.
+    """
+    if _STATE_KEY in arrays:
+        raise ValueError(f"array name {_STATE_KEY!r} is reserved")
+    os.makedirs(directory, exist_ok=True)
+    record = {"format": FORMAT_NAME, "version": FORMAT_VERSION, "episode": episode, **state}
+
+    path = checkpoint_path(directory, episode)
+    atomic_write(path, lambda f: np.savez(
+        f, **arrays, **{_STATE_KEY: np.array(json.dumps(record))}))
+
+    for old in list_checkpoints(directory)[:-keep] if keep else []:
+        os.remove(old)
+    return path
+
+
+def load_checkpoint(path):
+    """Return (arrays, state) from a file written by save_checkpoint."""
+    with np.load(path, allow_pickle=False) as data:
+        if _STATE_KEY not in data.files:
+            raise ValueError(f"{path} is not a {FORMAT_NAME} file")
+        state = json.loads(str(data[_STATE_KEY]))
+        arrays = {name: data[name] for name in data.files if name != _STATE_KEY}
+
+    if state.get("format") != FORMAT_NAME:
+        raise ValueError(f"{path} is not a {FORMAT_NAME} file")
+    if state.get("version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported checkpoint format version {state.get('version')} "
+                         f"(expected {FORMAT_VERSION})")
+    return arrays, state
@@ -1,7 +1,10 @@
 # entities.py
 
 class Entity:
-    """Base class for Pac-Man and Ghosts."""
+    """Base class for movable entities (Pac-Man; ghosts live in arrays, see env/ghosts.py)."""
+    # Slots: no per-instance __dict__, and attribute access stays cheap in the step loop
+    __slots__ = ("x", "y")
+
     def __init__(self, x, y):
         self.x = x
         self.y = y
@@ -13,11 +16,7 @@ class Entity:
 
 class Pacman(Entity):
     """Pac-Man player entity."""
-    def __init__(self, x, y):
-        super().__init__(x, y)
-
+    __slots__ = ()
 
-class Ghost(Entity):
-    """Ghost enemy entity."""
     def __init__(self, x, y):
         super().__init__(x, y)
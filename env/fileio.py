@@ -0,0 +1,16 @@
+import os
+
+
+def atomic_write(path, write):
+    """
+    Replace the file at path with whatever write(f) puts into a binary file.
+    The data goes to <path>.tmp, is fsynced, then renamed over path, so
+    readers (and a run killed mid-save) see the old file or the new one,
+    never half of one.
+    """
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
@@ -1,78 +1,134 @@
+import numpy as np
+from .mazes import Layout, parse_layout
+from .pathfinding import DotDistanceField, get_distance_oracle, get_grid_graph, get_playable_mask
+
+# Per-layout templates, keyed by Layout.key:
+# (dot set, per-row lists of wall flags)
+_TEMPLATE_CACHE = {}
+
+
 class GameMap:
     """
-    Standard fully connected Pac-Man maze.
+    Fully connected Pac-Man maze, the arcade board by default.
     # = wall
     . = dot
     P = power pellet
     = = ghost gate
     space = empty
+    S / G = Pac-Man / ghost starts
+    `layout` may be a Layout (env/mazes.py: files, generated mazes) or
+    maze text in the same format.
     """
 
-    def __init__(self):
-        # Load ONLY the fixed, connected maze
-        self._raw_maze = self._maze_arcade_clean()
+    def __init__(self, layout=None):
+        if layout is None:
+            layout = parse_layout(self._maze_arcade_clean(), "arcade")
+        elif not isinstance(layout, Layout):
+            layout = parse_layout(layout)
+        self.layout = layout
+        self._load_template()
         self._build_grid()
 
+        # Fresh nearest-dot field for a full board, copied on reset()
+        self._pristine_field = None
+
+        # Walls never change, so the distance oracle survives reset()
+        self._oracle = None
+        self._oracle_built = False
+        self._graph = None
+        self._playable = None
+
     # -------------------------------
     # WALL CHECK
     # -------------------------------
     def is_wall(self, x, y):
         if x < 0 or x >= self.width or y < 0 or y >= self.height:
             return True
-        return self.grid[y][x] == 1
+        # Walls never change, so plain lists beat indexing the numpy grid
+        return self._wall_rows[y][x]
 
     def remaining_dots(self):
-        return sum(row.count(2) for row in self.grid)
+        return len(self.dots)
+
+    def eat_dot(self, x, y):
+        """Remove the dot at (x, y) if there is one. Returns True if a dot was eaten."""
+        if self.grid[y, x] != 2:
+            return False
+        self.grid[y, x] = 0
+        self.dots.discard((x, y))
+        if self._dot_field is not None:
+            self._dot_field.remove_dot(x, y)
+        return True
+
+    def dot_field(self):
+        """Nearest-dot distance field, built on first use and kept in sync by eat_dot()."""
+        if self._dot_field is None:
+            self._dot_field = DotDistanceField(self, self.dots)
+        return self._dot_field
+
+    def distance_oracle(self):
+        """All-pairs distance / next-hop table for this layout (None if too large)."""
+        if not self._oracle_built:
+            self._oracle = get_distance_oracle(self)
+            self._oracle_built = True
+        return self._oracle
+
+    def grid_graph(self):
+        """Flat adjacency + search scratch space used by a_star_path / bfs_path."""
+        if self._graph is None:
+            self._graph = get_grid_graph(self)
+        return self._graph
+
+    def playable_mask(self):
+        """(H, W) bool mask of the tiles reachable from Pac-Man's start (read-only)."""
+        if self._playable is None:
+            self._playable = get_playable_mask(self)
+        return self._playable
 
     def reset(self):
-        """Rebuild the grid so dots respawn on reset."""
-        self._build_grid()
+        """Restore the pristine grid (dots respawn) by copying the cached template."""
+        np.copyto(self.grid, self._template)
+        self.dots = set(self._template_dots)
+        self.ghost_positions = self.ghost_starts[:]
 
-    # -------------------------------
-    # PARSER
-    # -------------------------------
-    def _parse(self, maze_str):
-        raw_lines = [line.rstrip() for line in maze_str.split("\n") if line.strip()]
-        max_width = max(len(line) for line in raw_lines)
-
-        grid = []
-        for line in raw_lines:
-            padded = line.ljust(max_width, " ")  # pad with empty, NOT walls
-
-            row = []
-            for ch in padded:
-                if ch == "#":
-                    row.append(1)     # wall
-                elif ch == ".":
-                    row.append(2)     # dot
-                elif ch == "P":
-                    row.append(2)     # power pellet as dot
-                elif ch == "=":
-                    row.append(0)     # ghost gate
-                else:
-                    row.append(0)     # empty
-            grid.append(row)
-
-        return grid
+        # Only maintain a dot field if this map has been using one
+        if self._dot_field is not None:
+            if self._pristine_field is None:
+                self._pristine_field = DotDistanceField(self, self._template_dots)
+            self._dot_field = self._pristine_field.copy()
+
+    def _load_template(self):
+        # Each layout is indexed once per process; maps only copy its grid
+        key = self.layout.key
+        if key not in _TEMPLATE_CACHE:
+            grid = self.layout.grid
+            ys, xs = np.nonzero(grid == 2)
+            _TEMPLATE_CACHE[key] = (frozenset(zip(xs.tolist(), ys.tolist())),
+                                    (grid == 1).tolist())
+        self._template = self.layout.grid
+        self._template_dots, self._wall_rows = _TEMPLATE_CACHE[key]
 
     def _build_grid(self):
-        # Parse into a grid
-        self.grid = self._parse(self._raw_maze)
+        # Working copy of the parsed template
+        self.grid = self._template.copy()
 
-        self.height = len(self.grid)
-        self.width = len(self.grid[0])
+        self.height, self.width = self.grid.shape
 
-        # Pac-Man always starts here
-        self.start_pos = (1, 1)
+        # Live dot index, kept in sync by eat_dot() so nothing rescans the grid
+        self.dots = set(self._template_dots)
+        self._dot_field = None
 
-        # Ghost starts at center of ghost room
-        self.ghost_starts = [(self.width // 2, self.height // 2)]
+        # Start tiles come from the layout's S / G markers
+        self.start_pos = self.layout.start
+        self.ghost_starts = list(self.layout.ghost_starts)
         self.ghost_positions = self.ghost_starts[:]
 
     # -------------------------------
     # FIXED, CONNECTED MAZE
     # -------------------------------
     def _maze_arcade_clean(self):
+        # Pac-Man starts at the default (1, 1); Blinky waits at the center of
+        # the ghost room, Pinky, Inky and Clyde along the lower pen row
         return """
 ############################
 #............##............#
@@ -84,11 +140,11 @@ class GameMap:
 #.####.##....##....##.####.#
 #......##### ## #####......#
 ######.##### ## #####.######
-######.##          ##.######
+######.##     G    ##.######
 ######.## ######## ##.######
 #............##............#
 #.####.#####.##.#####.####.#
-#P.......##   G   ##.......P#
+#P.......## G G G ##.......P#
 ######.## ######## ##.######
 ######.##          ##.######
 ######.## ######## ##.######
@@ -0,0 +1,178 @@
+"""
+Ghost rules shared by PacmanEnv (one game) and PacmanVecEnv (N games).
+
+Ghost i has personality i % 4, its own scatter corner and its own
+scatter/chase timer. The mode cycle works on state arrays of any shape.
+Targeting exists in a scalar form (used by PacmanEnv, where a handful of
+ghosts is cheaper to handle with plain ints than with tiny arrays) and a
+batched form over a leading games axis (used by PacmanVecEnv); both must
+give the same targets.
+"""
+from collections import deque
+
+import numpy as np
+
+from .pathfinding import layout_key
+
+# Personalities (arcade names), assigned in this order
+BLINKY, PINKY, INKY, CLYDE = range(4)
+GHOST_NAMES = ("blinky", "pinky", "inky", "clyde")
+
+# Modes and how long each lasts in "mixed" play
+SCATTER, CHASE = 0, 1
+SCATTER_STEPS = 40
+CHASE_STEPS = 80
+MODE_LIMITS = np.array([SCATTER_STEPS, CHASE_STEPS], dtype=np.int64)
+
+# Ghost i enters its first chase phase MODE_STAGGER * i steps after Blinky
+MODE_STAGGER = 5
+
+# Pinky aims this many tiles ahead of Pac-Man, Inky uses half of it
+PINKY_LEAD = 4
+INKY_LEAD = 2
+
+# Clyde gives up the chase inside this (straight-line) radius
+CLYDE_RADIUS = 8
+
+# Cell -> nearest cell of the playable maze, keyed by (wall layout, Pac-Man start)
+_SNAP_CACHE = {}
+
+
+def ghost_personalities(num_ghosts):
+    return np.arange(num_ghosts, dtype=np.int64) % 4
+
+
+def initial_mode_timers(num_ghosts):
+    """Negative start values delay each ghost's cycle (see MODE_STAGGER)."""
+    return -MODE_STAGGER * np.arange(num_ghosts, dtype=np.int64)
+
+
+def scatter_corners(map_obj, num_ghosts):
+    """
+    (num_ghosts, 2) scatter targets: Blinky top-right, Pinky top-left,
+    Inky bottom-right, Clyde bottom-left, each moved onto the nearest
+    open tile so ghosts can actually reach it.
+    """
+    w, h = map_obj.width, map_obj.height
+    corners = np.array([(w - 2, 1), (1, 1), (w - 2, h - 2), (1, h - 2)], dtype=np.int64)
+    return snap_targets(snap_table(map_obj), corners[ghost_personalities(num_ghosts)])
+
+
+# -------------------------------
+# MODE CYCLE
+# -------------------------------
+def update_modes(modes, timers, setting):
+    """
+    Advance the scatter/chase cycle in place. `modes` and `timers` are
+    int arrays of any shape (one entry per ghost); `setting` is the env's
+    ghost_mode ("mixed", "chase" or "scatter").
+    """
+    if setting == "chase":
+        modes[...] = CHASE
+        return
+    if setting == "scatter":
+        modes[...] = SCATTER
+        return
+
+    timers += 1
+    switch = timers > MODE_LIMITS[modes]
+    if switch.any():
+        modes[switch] ^= 1
+        timers[switch] = 0
+
+
+def steps_until_switch(modes, timers):
+    """
+    Number of "mixed" update_modes() calls until the next ghost changes
+    mode (the call that makes the switch included).
+    """
+    return int((MODE_LIMITS[modes] + 1 - timers).min())
+
+
+# -------------------------------
+# TARGET SNAPPING
+# -------------------------------
+def snap_table(map_obj):
+    """
+    (height, width, 2) int64 array giving, for every cell, the (x, y) of the
+    nearest cell of the maze component Pac-Man starts in. Targets are
+    snapped through it so a wall or an unreachable tile never becomes a goal.
+    """
+    key = (layout_key(map_obj), tuple(map_obj.start_pos))
+    if key not in _SNAP_CACHE:
+        _SNAP_CACHE[key] = _build_snap_table(map_obj)
+    return _SNAP_CACHE[key]
+
+
+def _build_snap_table(map_obj):
+    w, h = map_obj.width, map_obj.height
+    playable = map_obj.playable_mask().ravel()
+
+    # BFS over the whole rectangle (walls included) from every playable cell
+    nearest = [-1] * (w * h)
+    queue = deque()
+    for c in np.flatnonzero(playable).tolist():
+        nearest[c] = c
+        queue.append(c)
+    while queue:
+        c = queue.popleft()
+        x, y = c % w, c // w
+        for nx, ny in ((x, y - 1), (x, y + 1), (x - 1, y), (x + 1, y)):
+            if 0 <= nx < w and 0 <= ny < h and nearest[ny * w + nx] < 0:
+                nearest[ny * w + nx] = nearest[c]
+                queue.append(ny * w + nx)
+
+    nearest = np.array(nearest, dtype=np.int64)
+    table = np.stack([nearest % w, nearest // w], axis=1).reshape(h, w, 2)
+    table.flags.writeable = False
+    return table
+
+
+def snap_targets(table, targets):
+    """Clip (..., 2) targets to the board and move each onto the playable maze."""
+    h, w = table.shape[:2]
+    x = np.clip(targets[..., 0], 0, w - 1)
+    y = np.clip(targets[..., 1], 0, h - 1)
+    return table[y, x]
+
+
+# -------------------------------
+# SCALAR RULES (PacmanEnv)
+# -------------------------------
+def chase_target(personality, pacman, pacman_dir, ghost, blinky, corner):
+    """Where one ghost heads in chase mode (may be off the maze; snap it)."""
+    px, py = pacman
+    dx, dy = pacman_dir
+    if personality == PINKY:
+        return (px + PINKY_LEAD * dx, py + PINKY_LEAD * dy)
+    if personality == INKY:
+        # Double the vector from Blinky to the tile two ahead of Pac-Man
+        return (2 * (px + INKY_LEAD * dx) - blinky[0],
+                2 * (py + INKY_LEAD * dy) - blinky[1])
+    if personality == CLYDE:
+        gx, gy = ghost
+        if (gx - px) ** 2 + (gy - py) ** 2 <= CLYDE_RADIUS ** 2:
+            return corner
+    return (px, py)
+
+
+# -------------------------------
+# BATCHED RULES (PacmanVecEnv)
+# -------------------------------
+def chase_targets(pacman, pacman_dir, ghosts, personality, corners):
+    """
+    Batched chase_target: pacman and pacman_dir are (N, 2), ghosts (N, G, 2),
+    personality (G,) and corners (G, 2). Returns unsnapped (N, G, 2) targets.
+    """
+    pac = pacman[:, None, :]
+    lead = pacman_dir[:, None, :]
+    pinky = (personality == PINKY)[:, None]
+    inky = (personality == INKY)[:, None]
+    clyde = (personality == CLYDE)[:, None]
+
+    targets = np.broadcast_to(pac, ghosts.shape)
+    targets = np.where(pinky, pac + PINKY_LEAD * lead, targets)
+    targets = np.where(inky, 2 * (pac + INKY_LEAD * lead) - ghosts[:, :1, :], targets)
+
+    near = ((ghosts - pac) ** 2).sum(axis=2, keepdims=True) <= CLYDE_RADIUS ** 2
+    return np.where(clyde & near, corners, targets)
@@ -0,0 +1,103 @@
+"""
+Gymnasium adapter for PacmanEnv, plus a subprocess vector env.
+
+    from env.gym_env import make_env, make_vector_env
+    env = make_env(obs_mode="planes")            # TimeLimit(PacmanGymEnv)
+    obs, info = env.reset(seed=0)
+    obs, reward, terminated, truncated, info = env.step(env.action_space.sample())
+
+    vec = make_vector_env(8, obs_mode="egocentric")   # 8 worker processes
+    obs, info = vec.reset(seed=0)                     # (8, 4, 11, 11)
+
+Importing this module registers the id "Pacman-v0" with gymnasium.
+Needs the optional gymnasium package (pip install gymnasium); the rest of
+the project runs without it.
+"""
+from functools import partial
+
+import numpy as np
+
+try:
+    import gymnasium as gym
+    from gymnasium import spaces
+except ImportError as e:
+    raise ImportError("env.gym_env needs gymnasium: pip install gymnasium") from e
+
+from .observations import GHOST_CODE, PACMAN_CODE, observation_shape
+from .pacman_env import MAX_EPISODE_STEPS, PacmanEnv
+
+ENV_ID = "Pacman-v0"
+
+
+class PacmanGymEnv(gym.Env):
+    """
+    gymnasium.Env view of one PacmanEnv. Actions are Discrete(4)
+    (0=up, 1=down, 2=left, 3=right); a caught Pac-Man or a cleared board
+    terminates the episode. There is no step limit of its own: wrap it in
+    TimeLimit (make_env does) for truncation.
+    Observations are copies, so they stay valid after the next step.
+    """
+
+    metadata = {"render_modes": ["human"]}
+
+    def __init__(self, ghost_mode="mixed", num_ghosts=1, obs_mode="planes",
+                 view_radius=5, layout=None, render_mode=None):
+        if obs_mode == "none":
+            raise ValueError('PacmanGymEnv needs an observation; use any obs_mode but "none"')
+        if render_mode is not None and render_mode not in self.metadata["render_modes"]:
+            raise ValueError(f"Unsupported render_mode: {render_mode!r}")
+
+        self.env = PacmanEnv(ghost_mode=ghost_mode, num_ghosts=num_ghosts,
+                             obs_mode=obs_mode, view_radius=view_radius, layout=layout)
+        self.render_mode = render_mode
+        self.action_space = spaces.Discrete(len(self.env.actions))
+        self.observation_space = observation_space(self.env.map, num_ghosts,
+                                                   obs_mode, view_radius)
+
+    def reset(self, *, seed=None, options=None):
+        super().reset(seed=seed)
+        obs = self.env.reset(seed=seed).copy()
+        if self.render_mode == "human":
+            self.env.render()
+        return obs, {}
+
+    def step(self, action):
+        obs, reward, done, _ = self.env.step(int(action))
+        if self.render_mode == "human":
+            self.env.render()
+        return obs.copy(), float(reward), done, False, {}
+
+    def render(self):
+        if self.render_mode == "human":
+            self.env.render()
+
+
+def observation_space(map_obj, num_ghosts, obs_mode, view_radius=5):
+    """Box space matching PacmanEnv.get_observation() for obs_mode."""
+    shape = observation_shape(obs_mode, map_obj.height, map_obj.width, num_ghosts, view_radius)
+    if obs_mode == "grid":
+        return spaces.Box(0, max(GHOST_CODE, PACMAN_CODE), shape, dtype=np.uint8)
+    if obs_mode == "positions":
+        high = np.broadcast_to([map_obj.width - 1, map_obj.height - 1], shape)
+        return spaces.Box(0, high, shape, dtype=np.int64)
+    return spaces.Box(0, 1, shape, dtype=np.uint8)
+
+
+def make_env(max_episode_steps=MAX_EPISODE_STEPS, **kwargs):
+    """PacmanGymEnv(**kwargs) truncated after max_episode_steps steps."""
+    return gym.wrappers.TimeLimit(PacmanGymEnv(**kwargs), max_episode_steps=max_episode_steps)
+
+
+def make_vector_env(num_envs, max_episode_steps=MAX_EPISODE_STEPS, context=None, **kwargs):
+    """
+    AsyncVectorEnv running num_envs make_env(...) copies in worker processes.
+    Workers write observations straight into shared memory, so batches are
+    not pickled back to the parent. reset(seed=s) seeds copy i with s + i.
+    """
+    fns = [partial(make_env, max_episode_steps=max_episode_steps, **kwargs)
+           for _ in range(num_envs)]
+    return gym.vector.AsyncVectorEnv(fns, shared_memory=True, context=context)
+
+
+if ENV_ID not in gym.registry:
+    gym.register(id=ENV_ID, entry_point=PacmanGymEnv, max_episode_steps=MAX_EPISODE_STEPS)
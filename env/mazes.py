@@ -0,0 +1,295 @@
+"""
+Maze layouts: parsing, validation, files, procedural generation and an
+on-disk cache of parsed layouts.
+
+Layout text uses one character per tile:
+    # = wall          . = dot          P = power pellet (a dot)
+    = = ghost gate    space = empty
+    S = Pac-Man start (empty; defaults to (1, 1) if absent)
+    G = ghost start (empty); ghosts take them in reading order:
+        Blinky, Pinky, Inky, Clyde
+Short lines are padded with empty floor.
+
+    layout = load_layout("mazes/big.txt")
+    layout = generate_maze(301, 201, seed=0)        # ~100x the arcade board
+    env = PacmanEnv(layout=layout)
+"""
+import hashlib
+import os
+from collections import deque
+
+import numpy as np
+
+from .fileio import atomic_write
+
+# Maze character -> tile code (anything not listed is empty floor)
+TILE_CODES = np.zeros(256, dtype=np.uint8)
+TILE_CODES[ord("#")] = 1   # wall
+TILE_CODES[ord(".")] = 2   # dot
+TILE_CODES[ord("P")] = 2   # power pellet as dot
+TILE_CODES[ord("=")] = 0   # ghost gate
+
+START_MARK = "S"
+GHOST_MARK = "G"
+DEFAULT_START = (1, 1)
+
+# Parsed layouts, keyed by layout text
+_PARSE_CACHE = {}
+
+
+class Layout:
+    """
+    A parsed, validated maze: (height, width) uint8 tile grid
+    (0 empty, 1 wall, 2 dot), Pac-Man's start tile and the ghost start
+    tiles, all (x, y). The grid is read-only; maps copy it.
+    """
+
+    def __init__(self, grid, start, ghost_starts, name="custom"):
+        self.grid = grid
+        self.grid.flags.writeable = False
+        self.start = tuple(int(v) for v in start)
+        self.ghost_starts = [tuple(int(v) for v in pos) for pos in ghost_starts]
+        self.name = name
+        self._key = None
+
+    def __repr__(self):
+        return f"Layout({self.name!r}, {self.width}x{self.height})"
+
+    @property
+    def height(self):
+        return self.grid.shape[0]
+
+    @property
+    def width(self):
+        return self.grid.shape[1]
+
+    @property
+    def key(self):
+        """Content hash (tiles and starts), used to share per-layout caches."""
+        if self._key is None:
+            h = hashlib.sha1(self.grid.tobytes())
+            h.update(repr((self.grid.shape, self.start, self.ghost_starts)).encode())
+            self._key = h.hexdigest()
+        return self._key
+
+    def to_text(self):
+        rows = [[" #."[code] for code in row] for row in self.grid.tolist()]
+        x, y = self.start
+        rows[y][x] = START_MARK
+        for x, y in self.ghost_starts:
+            rows[y][x] = GHOST_MARK
+        return "\n".join("".join(row) for row in rows) + "\n"
+
+
+# -------------------------------
+# PARSING + VALIDATION
+# -------------------------------
+def parse_layout(text, name="custom"):
+    """Parse and validate layout text (cached per process, by text)."""
+    if text not in _PARSE_CACHE:
+        lines = [line.rstrip() for line in text.split("\n") if line.strip()]
+        if not lines:
+            raise ValueError(f"layout {name!r} is empty")
+        width = max(len(line) for line in lines)
+
+        # Contiguous (height, width) uint8 array, one byte per tile
+        padded = "".join(line.ljust(width, " ") for line in lines)  # pad with empty, NOT walls
+        chars = np.frombuffer(padded.encode("ascii"), dtype=np.uint8).reshape(len(lines), width)
+        grid = TILE_CODES[chars]
+
+        starts = _marks(chars, START_MARK)
+        if len(starts) > 1:
+            raise ValueError(f"layout {name!r} has {len(starts)} '{START_MARK}' markers (at most one)")
+        start = starts[0] if starts else DEFAULT_START
+
+        layout = Layout(grid, start, _marks(chars, GHOST_MARK), name)
+        validate_layout(layout)
+        _PARSE_CACHE[text] = layout
+    return _PARSE_CACHE[text]
+
+
+def _marks(chars, mark):
+    ys, xs = np.nonzero(chars == ord(mark))
+    return list(zip(xs.tolist(), ys.tolist()))
+
+
+def validate_layout(layout):
+    """
+    Raise ValueError unless Pac-Man's start is open, there is at least one
+    ghost start and dot, and every dot and ghost start can be reached from
+    Pac-Man's start.
+    """
+    grid = layout.grid
+    h, w = grid.shape
+    x, y = layout.start
+    if not (0 <= x < w and 0 <= y < h) or grid[y, x] == 1:
+        raise ValueError(f"layout {layout.name!r}: Pac-Man start {layout.start} is not an open tile")
+    if not layout.ghost_starts:
+        raise ValueError(f"layout {layout.name!r} has no '{GHOST_MARK}' ghost start")
+    if not (grid == 2).any():
+        raise ValueError(f"layout {layout.name!r} has no dots")
+
+    reached = reachable_mask(grid, layout.start)
+    stray = [pos for pos in layout.ghost_starts if not reached[pos[1], pos[0]]]
+    if stray:
+        raise ValueError(f"layout {layout.name!r}: ghost starts {stray} cannot reach Pac-Man")
+    unreachable = int(np.count_nonzero((grid == 2) & ~reached))
+    if unreachable:
+        raise ValueError(f"layout {layout.name!r}: {unreachable} dots cannot be reached")
+
+
+def reachable_mask(grid, start):
+    """(height, width) bool mask of tiles connected to start (4-neighbour BFS)."""
+    h, w = grid.shape
+    open_cells = (grid != 1).ravel().tolist()
+    seen = [False] * (w * h)
+    root = start[1] * w + start[0]
+    seen[root] = True
+    queue = deque([root])
+    while queue:
+        c = queue.popleft()
+        x = c % w
+        for n, ok in ((c - w, c >= w), (c + w, c < (h - 1) * w),
+                      (c - 1, x > 0), (c + 1, x < w - 1)):
+            if ok and open_cells[n] and not seen[n]:
+                seen[n] = True
+                queue.append(n)
+    return np.array(seen, dtype=bool).reshape(h, w)
+
+
+# -------------------------------
+# FILES + DISK CACHE
+# -------------------------------
+def load_layout(path, cache_dir=None):
+    """
+    Load a layout from a text file (see module docstring) or from an .npz
+    written by save_layout. With cache_dir, text layouts are parsed and
+    validated once and then read back from <cache_dir>/<hash>.npz.
+    """
+    if path.endswith(".npz"):
+        return _read_npz(path)
+
+    with open(path) as f:
+        text = f.read()
+    name = os.path.splitext(os.path.basename(path))[0]
+    if cache_dir is None:
+        return parse_layout(text, name)
+
+    cached = os.path.join(cache_dir, hashlib.sha1(text.encode()).hexdigest() + ".npz")
+    if os.path.exists(cached):
+        return _read_npz(cached)
+    layout = parse_layout(text, name)
+    save_layout(layout, cached)
+    return layout
+
+
+def save_layout(layout, path):
+    """Write a parsed layout as .npz (atomically, so readers never see half a file)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    atomic_write(path, lambda f: np.savez(
+        f, grid=layout.grid, start=np.array(layout.start),
+        ghost_starts=np.array(layout.ghost_starts).reshape(-1, 2),
+        name=np.array(layout.name)))
+
+
+def _read_npz(path):
+    with np.load(path, allow_pickle=False) as data:
+        return Layout(data["grid"].copy(), data["start"], data["ghost_starts"].tolist(),
+                      str(data["name"]))
+
+
+# -------------------------------
+# PROCEDURAL MAZES
+# -------------------------------
+def generate_maze(width, height, seed=None, braid=0.5, num_ghosts=4, cache_dir=None):
+    """
+    Random connected maze of width x height tiles (both odd, >= 7), filled
+    with dots. A depth-first backtracker carves a perfect maze on the odd
+    cells, then each dead end is opened into a loop with probability
+    `braid` (0 = perfect maze, 1 = no dead ends) so ghosts can be evaded.
+    Pac-Man starts at (1, 1); ghosts start on the open tiles nearest the
+    centre (in reading order, so Blinky is the top-left one). The same
+    arguments always give the same maze.
+    """
+    if width % 2 == 0 or height % 2 == 0 or width < 7 or height < 7:
+        raise ValueError(f"maze size must be odd and at least 7x7, got {width}x{height}")
+    if not 0.0 <= braid <= 1.0:
+        raise ValueError(f"braid must be in [0, 1], got {braid}")
+
+    name = f"maze-{width}x{height}-seed{seed}-braid{braid}-g{num_ghosts}"
+    if cache_dir is not None:
+        cached = os.path.join(cache_dir, name + ".npz")
+        if seed is not None and os.path.exists(cached):
+            return _read_npz(cached)
+
+    rng = np.random.default_rng(seed)
+    grid = np.ones((height, width), dtype=np.uint8)
+    _carve(grid, rng)
+    _braid(grid, rng, braid)
+
+    grid[grid == 0] = 2
+    start = DEFAULT_START
+    ghost_starts = _central_tiles(grid, num_ghosts, exclude=start)
+    grid[start[1], start[0]] = 0
+    for x, y in ghost_starts:
+        grid[y, x] = 0
+
+    layout = Layout(grid, start, ghost_starts, name)
+    validate_layout(layout)
+    if cache_dir is not None and seed is not None:
+        save_layout(layout, cached)
+    return layout
+
+
+# Moves between maze cells (two tiles apart) and the wall tile in between
+_CELL_STEPS = ((0, -2), (0, 2), (-2, 0), (2, 0))
+
+
+def _carve(grid, rng):
+    h, w = grid.shape
+    grid[1, 1] = 0
+    stack = [(1, 1)]
+    while stack:
+        x, y = stack[-1]
+        options = [(dx, dy) for dx, dy in _CELL_STEPS
+                   if 0 < x + dx < w - 1 and 0 < y + dy < h - 1 and grid[y + dy, x + dx] == 1]
+        if not options:
+            stack.pop()
+            continue
+        dx, dy = options[int(rng.random() * len(options))]
+        grid[y + dy // 2, x + dx // 2] = 0
+        grid[y + dy, x + dx] = 0
+        stack.append((x + dx, y + dy))
+
+
+def _braid(grid, rng, braid):
+    h, w = grid.shape
+    for y in range(1, h - 1, 2):
+        for x in range(1, w - 1, 2):
+            walls = [(dx, dy) for dx, dy in _CELL_STEPS
+                     if grid[y + dy // 2, x + dx // 2] == 1]
+            if len(walls) < 3 or rng.random() >= braid:
+                continue
+            # Knock through to a neighbouring cell that is inside the border
+            inner = [(dx, dy) for dx, dy in walls
+                     if 0 < x + dx < w - 1 and 0 < y + dy < h - 1]
+            if inner:
+                dx, dy = inner[int(rng.random() * len(inner))]
+                grid[y + dy // 2, x + dx // 2] = 0
+
+
+def _central_tiles(grid, count, exclude):
+    """
+    The `count` open tiles closest (straight-line) to the centre, in reading
+    order like parsed 'G' markers.
+    """
+    h, w = grid.shape
+    ys, xs = np.nonzero(grid != 1)
+    dist = (xs - w // 2) ** 2 + (ys - h // 2) ** 2
+    picks = []
+    for i in np.lexsort((xs, ys, dist)).tolist():
+        if (xs[i], ys[i]) != exclude:
+            picks.append((int(xs[i]), int(ys[i])))
+        if len(picks) == count:
+            break
+    return sorted(picks, key=lambda pos: (pos[1], pos[0]))
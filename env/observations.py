@@ -0,0 +1,127 @@
+"""
+Observation modes shared by PacmanEnv and PacmanVecEnv.
+
+    "grid"        (H, W) uint8: 0 empty, 1 wall, 2 dot, 3 ghost, 4 Pac-Man
+    "planes"      (4, H, W) uint8 0/1 planes: walls, dots, Pac-Man, ghosts
+    "egocentric"  (4, K, K) planes cropped around Pac-Man, K = 2 * view_radius + 1;
+                  tiles beyond the board read as walls
+    "positions"   (1 + G, 2) int64 (x, y): Pac-Man first, then each ghost
+    "none"        no observation (get_observation() returns None)
+
+An ObservationBuilder owns one preallocated buffer with a leading batch
+axis and rewrites it on every build(); callers get that buffer back, so
+copy an observation if you need to keep it.
+"""
+import numpy as np
+
+OBS_MODES = ("grid", "planes", "egocentric", "positions", "none")
+
+# Plane order for "planes" and "egocentric"
+PLANE_WALLS, PLANE_DOTS, PLANE_PACMAN, PLANE_GHOSTS = range(4)
+NUM_PLANES = 4
+
+# Tile codes of the "grid" mode (walls and dots come from the map grid)
+GHOST_CODE = 3
+PACMAN_CODE = 4
+
+
+def check_obs_mode(obs_mode):
+    if obs_mode not in OBS_MODES:
+        raise ValueError(f"Unknown obs_mode: {obs_mode!r} (expected one of {', '.join(OBS_MODES)})")
+
+
+def observation_shape(obs_mode, height, width, num_ghosts, view_radius=5):
+    """Shape of one observation (no batch axis); None for "none"."""
+    check_obs_mode(obs_mode)
+    if obs_mode == "grid":
+        return (height, width)
+    if obs_mode == "planes":
+        return (NUM_PLANES, height, width)
+    if obs_mode == "egocentric":
+        size = 2 * view_radius + 1
+        return (NUM_PLANES, size, size)
+    if obs_mode == "positions":
+        return (1 + num_ghosts, 2)
+    return None
+
+
+class ObservationBuilder:
+    """
+    Writes observations for a batch of games into one reused buffer.
+    build() takes the (N, H, W) boards, (N, 2) Pac-Man and (N, G, 2) ghost
+    positions and returns the (N, *shape) buffer.
+    """
+
+    def __init__(self, obs_mode, map_obj, num_ghosts, batch_size=1, view_radius=5):
+        self.obs_mode = obs_mode
+        self.shape = observation_shape(obs_mode, map_obj.height, map_obj.width,
+                                       num_ghosts, view_radius)
+        self.view_radius = view_radius
+        self.buffer = None
+        if self.shape is None:
+            return
+
+        dtype = np.int64 if obs_mode == "positions" else np.uint8
+        self.buffer = np.zeros((batch_size,) + self.shape, dtype=dtype)
+        self._rows = np.arange(batch_size)
+
+        walls = map_obj.grid == 1
+        if obs_mode == "planes":
+            # Walls never change: fill that plane once
+            self.buffer[:, PLANE_WALLS] = walls
+        elif obs_mode == "egocentric":
+            # Whole-board planes with a view_radius border of walls, cropped per game
+            r = view_radius
+            self._padded = np.zeros((batch_size, NUM_PLANES, map_obj.height + 2 * r,
+                                     map_obj.width + 2 * r), dtype=np.uint8)
+            self._padded[:, PLANE_WALLS] = 1
+            self._padded[:, PLANE_WALLS, r:-r, r:-r] = walls
+            self._inner = self._padded[:, :, r:-r, r:-r]
+            self._window = np.arange(2 * r + 1)
+
+    def build(self, grids, pacman, ghosts):
+        if self.buffer is None:
+            return None
+        build = getattr(self, f"_build_{self.obs_mode}")
+        build(grids, pacman, ghosts)
+        return self.buffer
+
+    def _build_grid(self, grids, pacman, ghosts):
+        obs, rows = self.buffer, self._rows
+        np.copyto(obs, grids)
+        obs[rows, pacman[:, 1], pacman[:, 0]] = PACMAN_CODE
+        for g in range(ghosts.shape[1]):
+            obs[rows, ghosts[:, g, 1], ghosts[:, g, 0]] = GHOST_CODE
+
+    def _mark_planes(self, planes, grids, pacman, ghosts):
+        rows = self._rows
+        np.equal(grids, 2, out=planes[:, PLANE_DOTS].view(bool))
+        planes[:, PLANE_PACMAN] = 0
+        planes[rows, PLANE_PACMAN, pacman[:, 1], pacman[:, 0]] = 1
+        planes[:, PLANE_GHOSTS] = 0
+        for g in range(ghosts.shape[1]):
+            planes[rows, PLANE_GHOSTS, ghosts[:, g, 1], ghosts[:, g, 0]] = 1
+
+    def _build_planes(self, grids, pacman, ghosts):
+        self._mark_planes(self.buffer, grids, pacman, ghosts)
+
+    def _build_egocentric(self, grids, pacman, ghosts):
+        self._mark_planes(self._inner, grids, pacman, ghosts)
+        # Pac-Man at (x, y) sits at (x + r, y + r) in the padded planes, so the
+        # window around it starts at padded row y and column x
+        if len(self._rows) == 1:
+            # Single env: a slice copy is much cheaper than fancy indexing
+            x, y = pacman[0].tolist()
+            size = len(self._window)
+            self.buffer[0] = self._padded[0, :, y:y + size, x:x + size]
+            return
+        ys = pacman[:, 1, None] + self._window
+        xs = pacman[:, 0, None] + self._window
+        self.buffer[...] = self._padded[self._rows[:, None, None, None],
+                                        np.arange(NUM_PLANES)[None, :, None, None],
+                                        ys[:, None, :, None],
+                                        xs[:, None, None, :]]
+
+    def _build_positions(self, grids, pacman, ghosts):
+        self.buffer[:, 0] = pacman
+        self.buffer[:, 1:] = ghosts
@@ -1,12 +1,26 @@
 import numpy as np
-import random
 from .game_map import GameMap
-from .entities import Pacman, Ghost
-from .pathfinding import a_star_path
+from .entities import Pacman
+from .ghosts import (CHASE, SCATTER, chase_target, ghost_personalities,
+                     initial_mode_timers, scatter_corners, snap_table,
+                     steps_until_switch, update_modes)
+from .observations import ObservationBuilder, check_obs_mode
+from .pathfinding import IncrementalPathPlanner, distance_field
+
+# Episode cap used by the training loops and the gymnasium TimeLimit
+MAX_EPISODE_STEPS = 500
+
+# render() text for tile codes 0 (empty), 1 (wall), 2 (dot)
+_RENDER_TILES = ("  ", "# ", ". ")
 
 class PacmanEnv:
-    def __init__(self, ghost_mode="mixed"):
-        self.map = GameMap()
+    def __init__(self, ghost_mode="mixed", seed=None, num_ghosts=1,
+                 obs_mode="grid", view_radius=5, layout=None):
+        # layout: None (arcade board), a Layout or maze text (see env/mazes.py)
+        self.map = GameMap(layout)
+
+        # Private RNG for ghost randomness (seed: int, SeedSequence or None)
+        self.rng = np.random.default_rng(seed)
 
         # Ghost behavior mode control
         # "mixed"  -> scatter/chase cycles (classic feel)
@@ -18,14 +32,12 @@ class PacmanEnv:
         px, py = self.map.start_pos
         self.pacman = Pacman(px, py)
         
-        # Initialize one ghost (you can extend to more later)
-        self.ghosts = [Ghost(x, y) for (x, y) in self.map.ghost_positions]
-
-        # If map only provided one ghost start, keep it.
-        if not self.ghosts:
-            gx, gy = self.map.width - 2, self.map.height - 2
-            self.ghosts = [Ghost(gx, gy)]
-            self.map.ghost_positions = [(gx, gy)]
+        # Initialize ghosts: Blinky, Pinky, Inky, Clyde (the first num_ghosts)
+        starts = self.map.ghost_starts
+        if not 1 <= num_ghosts <= len(starts):
+            raise ValueError(f"num_ghosts must be between 1 and {len(starts)}, got {num_ghosts}")
+        self.num_ghosts = num_ghosts
+        self._ghost_starts = np.array(starts[:num_ghosts], dtype=np.int64)
 
         # Action dictionary: 0=up, 1=down, 2=left, 3=right
         self.actions = {
@@ -35,51 +47,106 @@ class PacmanEnv:
             3: (1, 0)     # right (x + 1)
         }
 
-        # --- Ghost behavior system (Pac-Man style-ish) ---
-        # Scatter: ghost runs toward its corner.
-        # Chase: ghost uses A* to chase Pac-Man.
-        self.mode = "scatter"       # "scatter" or "chase"
-        self.mode_timer = 0         # counts steps in current mode
+        # --- Ghost behavior system (Pac-Man style-ish, see env/ghosts.py) ---
+        # Ghost state lives in arrays with one row per ghost:
+        #   ghost_pos (G, 2) x, y | ghost_modes SCATTER/CHASE | ghost_timers
+        # Scatter: each ghost runs toward its own corner.
+        # Chase: each ghost heads for its personality's target tile.
+        self.ghost_pos = self._ghost_starts.copy()
+        self.ghost_modes = np.full(num_ghosts, SCATTER, dtype=np.int64)
+        self._initial_timers = initial_mode_timers(num_ghosts)
+        self.ghost_timers = self._initial_timers.copy()
+        self.ghost_personality = ghost_personalities(num_ghosts)
+        self.scatter_targets = scatter_corners(self.map, num_ghosts)
+
+        # Plain-int copies for the scalar step path: ghost tiles and modes
+        # mirror ghost_pos / ghost_modes and are refreshed whenever those change
+        self._ghost_start_tiles = [tuple(p) for p in starts[:num_ghosts]]
+        self._ghost_xy = self._ghost_start_tiles[:]
+        self._modes = self.ghost_modes.tolist()
+        self._mode_countdown = 1
+        self._personality = self.ghost_personality.tolist()
+        self._corners = [tuple(c) for c in self.scatter_targets.tolist()]
+        self._snap = [[tuple(c) for c in row] for row in snap_table(self.map).tolist()]
+
+        # Direction of Pac-Man's last move (Pinky and Inky aim ahead of it)
+        self.pacman_dir = (0, 0)
+
+        # Per-ghost cached A* paths, used on layouts too large for the oracle
+        self.ghost_planners = [IncrementalPathPlanner(self.map) for _ in range(num_ghosts)]
+
+        # Ghost distance field, computed at most once per step
+        self._danger = None
 
-        # Scatter target (top-right corner-ish)
-        self.scatter_target = (self.map.width - 2, 1)
+        # Observation mode (see env/observations.py). "grid" keeps its own
+        # scalar path; the others fill a batch-of-one ObservationBuilder
+        # buffer through views of the map grid and ghost_pos.
+        check_obs_mode(obs_mode)
+        self.obs_mode = obs_mode
+        self._obs = np.empty_like(self.map.grid)
+        self._obs_builder = ObservationBuilder(obs_mode, self.map, num_ghosts,
+                                               view_radius=view_radius)
+        self._grid_batch = self.map.grid[None]
+        self._ghost_batch = self.ghost_pos[None]
+        self._pacman_batch = np.empty((1, 2), dtype=np.int64)
+
+        # Info dict, reused every step
+        self._info = {}
 
     # Reset
-    def reset(self):
+    def reset(self, seed=None):
+        # Re-seed the env's RNG if asked, otherwise keep its stream going
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+
         # Rebuild map grid so dots respawn
         self.map.reset()
 
         # Reset Pac-Man
         self.pacman.x, self.pacman.y = self.map.start_pos
         
+        self.pacman_dir = (0, 0)
+
         # Reset Ghost(s)
-        for ghost, pos in zip(self.ghosts, self.map.ghost_positions):
-            ghost.x, ghost.y = pos
+        self.ghost_pos[:] = self._ghost_starts
+        self._ghost_xy[:] = self._ghost_start_tiles
+        for planner in self.ghost_planners:
+            planner.reset()
         
         # Reset ghost mode system
-        self.mode = "scatter"
-        self.mode_timer = 0
+        self.ghost_modes[:] = SCATTER
+        self.ghost_timers[:] = self._initial_timers
+        self._modes[:] = self.ghost_modes.tolist()
+        self._mode_countdown = 1
+        self._danger = None
 
         return self.get_observation()
 
     # Step function
-    def step(self, action):
+    def step(self, action, observe=True):
+        """
+        Advance the game by one move. Returns (obs, reward, done, info).
+        With observe=False the observation is not built and obs is None,
+        for callers that only read positions. `info` is the same dict
+        every step; don't keep or modify it.
+        """
         reward = 0
         done = False
+        pacman = self.pacman
         
         # ---------- Pac-Man movement ----------
-        dx, dy = self.actions[action]
-        new_x = self.pacman.x + dx
-        new_y = self.pacman.y + dy
+        self.pacman_dir = self.actions[action]
+        dx, dy = self.pacman_dir
+        new_x = pacman.x + dx
+        new_y = pacman.y + dy
         
         if not self.map.is_wall(new_x, new_y):
-            self.pacman.move(dx, dy)
+            pacman.x = new_x
+            pacman.y = new_y
             
             # Collect dot (2 = dot)
-            tile = self.map.grid[self.pacman.y][self.pacman.x]
-            if tile == 2:
+            if self.map.eat_dot(new_x, new_y):
                 reward += 10
-                self.map.grid[self.pacman.y][self.pacman.x] = 0
         else:
             # bump into wall penalty
             reward -= 2
@@ -88,85 +155,111 @@ class PacmanEnv:
         self.update_ghost_mode()
 
         # ---------- Ghost movement ----------
-        for g in self.ghosts:
-            self.ghost_smart_move(g)
+        ghost_positions = self.move_ghosts()
+
+        self._danger = None
 
         # ---------- Collisions ----------
-        for g in self.ghosts:
-            if (g.x, g.y) == (self.pacman.x, self.pacman.y):
+        px, py = pacman.x, pacman.y
+        for gx, gy in ghost_positions:
+            if gx == px and gy == py:
                 reward -= 100
                 done = True
+                break
         
         # ---------- Win condition ----------
         if self.map.remaining_dots() == 0:
             reward += 200
             done = True
         
-        return self.get_observation(), reward, done, {}
+        obs = self.get_observation() if observe else None
+        return obs, reward, done, self._info
 
     # Ghost mode system (scatter / chase cycling)
     def update_ghost_mode(self):
         """
-        Simple Pac-Man style mode cycles:
-        - Scatter for a while (ghost runs to corner)
-        - Then Chase (ghost chases Pac-Man)
+        Simple Pac-Man style mode cycles, one timer per ghost:
+        - Scatter for a while (ghost runs to its corner)
+        - Then Chase (ghost hunts Pac-Man its own way)
         - Then back to Scatter, etc.
+        Later ghosts start their cycle a few steps behind Blinky.
         """
-        # Allow overriding behavior from constructor
-        if self.ghost_mode_setting == "chase":
-            self.mode = "chase"
-            return
-        if self.ghost_mode_setting == "scatter":
-            self.mode = "scatter"
+        # Between switches the timers just tick; the full update (and the
+        # refresh of the scalar mode list) only runs when a countdown ends
+        self._mode_countdown -= 1
+        if self._mode_countdown > 0:
+            if self.ghost_mode_setting == "mixed":
+                self.ghost_timers += 1
             return
 
-        # Mixed cycles (default)
-        self.mode_timer += 1
-
-        if self.mode == "scatter":
-            # after ~40 steps, switch to chase
-            if self.mode_timer > 40:
-                self.mode = "chase"
-                self.mode_timer = 0
-        elif self.mode == "chase":
-            # after ~80 steps, switch back to scatter
-            if self.mode_timer > 80:
-                self.mode = "scatter"
-                self.mode_timer = 0
+        update_modes(self.ghost_modes, self.ghost_timers, self.ghost_mode_setting)
+        self._modes[:] = self.ghost_modes.tolist()
+        if self.ghost_mode_setting == "mixed":
+            self._mode_countdown = steps_until_switch(self.ghost_modes, self.ghost_timers)
+        else:
+            # "chase" / "scatter": the modes never change again
+            self._mode_countdown = float("inf")
 
     # Ghost movement: smarter, Pac-Man-like
-    def ghost_smart_move(self, ghost):
-        start = (ghost.x, ghost.y)
+    def ghost_targets(self, positions):
+        """Target tile of every ghost, from the ghosts' positions before they move."""
+        pacman = (self.pacman.x, self.pacman.y)
+        w, h = self.map.width, self.map.height
+        targets = []
+        for i, mode in enumerate(self._modes):
+            if mode == CHASE:
+                x, y = chase_target(self._personality[i], pacman, self.pacman_dir,
+                                    positions[i], positions[0], self._corners[i])
+                # Aim points can be walls or off the board: use the nearest open tile
+                x = min(max(x, 0), w - 1)
+                y = min(max(y, 0), h - 1)
+                targets.append(self._snap[y][x])
+            else:
+                # Run toward scatter corner
+                targets.append(self._corners[i])
+        return targets
 
-        if self.mode == "scatter":
-            # Run toward scatter corner
-            target = self.scatter_target
+    def move_ghosts(self):
+        """
+        Step every ghost along a shortest path to its target and return the
+        new positions as a list of (x, y).
+        With the distance oracle each ghost is one table lookup; without it
+        each ghost follows its incremental planner. PacmanVecEnv routes its
+        ghosts the same way, so its games replay like this env.
+        """
+        starts = self._ghost_xy
+        targets = self.ghost_targets(starts)
+
+        oracle = self.map.distance_oracle()
+        if oracle is not None:
+            next_positions = [oracle.next_step(s, t) for s, t in zip(starts, targets)]
         else:
-            # Chase Pac-Man
-            target = (self.pacman.x, self.pacman.y)
+            next_positions = [planner.next_step(s, t)
+                              for planner, s, t in zip(self.ghost_planners, starts, targets)]
 
-        path = a_star_path(self.map, start, target)
+        for i, next_pos in enumerate(next_positions):
+            if next_pos is None:
+                # No good path (or already at target) → move randomly but valid
+                next_positions[i] = self.ghost_random_move(starts[i])
 
-        if path and len(path) > 1:
-            # Move to next tile on A* path
-            next_x, next_y = path[1]
-            ghost.x, ghost.y = next_x, next_y
-        else:
-            # No good path (or already at target) → move randomly but valid
-            self.ghost_random_move(ghost)
+        self._ghost_xy = next_positions
+        self.ghost_pos[:] = next_positions
+        return next_positions
 
-    def ghost_random_move(self, ghost):
+    def ghost_random_move(self, pos):
+        """Random valid neighbor tile of pos (pos itself if boxed in)."""
         # Truly random among ALL valid neighbor tiles (no more left-right only)
+        x, y = pos
         valid_moves = []
         for dx, dy in self.actions.values():
-            new_x = ghost.x + dx
-            new_y = ghost.y + dy
+            new_x = x + dx
+            new_y = y + dy
             if not self.map.is_wall(new_x, new_y):
-                valid_moves.append((dx, dy))
+                valid_moves.append((new_x, new_y))
 
         if valid_moves:
-            dx, dy = random.choice(valid_moves)
-            ghost.move(dx, dy)
+            return valid_moves[int(self.rng.random() * len(valid_moves))]
+        return pos
 
     # Get valid actions for RL agent
     def get_valid_actions(self):
@@ -178,38 +271,59 @@ class PacmanEnv:
                 valid.append(a)
         return valid
 
+    def planner_stats(self):
+        """Reused vs. replanned ghost path queries (only counted without an oracle)."""
+        return {
+            "hits": sum(p.hits for p in self.ghost_planners),
+            "misses": sum(p.misses for p in self.ghost_planners),
+        }
+
+    def danger_field(self):
+        """
+        (H, W) maze distance from every cell to the nearest ghost
+        (-1 = wall). Cached until the ghosts move again.
+        """
+        if self._danger is None:
+            self._danger = distance_field(self.map, self.get_ghost_positions())
+        return self._danger
+
     def get_pacman_position(self):
         return (self.pacman.x, self.pacman.y)
 
     def get_ghost_positions(self):
-        return [(g.x, g.y) for g in self.ghosts]
+        return self._ghost_xy[:]
 
     # Rendering
     def render(self):
         print("----- PACMAN ENV -----")
-        for y in range(self.map.height):
-            row = ""
-            for x in range(self.map.width):
-                if (x, y) == (self.pacman.x, self.pacman.y):
-                    row += "P "
-                elif any((g.x, g.y) == (x, y) for g in self.ghosts):
-                    row += "G "
-                elif self.map.grid[y][x] == 2:
-                    row += ". "
-                elif self.map.grid[y][x] == 1:
-                    row += "# "
-                else:
-                    row += "  "
-            print(row)
+        # Tiles by code (0 empty, 1 wall, 2 dot), then ghosts, then Pac-Man on top
+        rows = [[_RENDER_TILES[code] for code in row] for row in self.map.grid.tolist()]
+        for x, y in self._ghost_xy:
+            rows[y][x] = "G "
+        rows[self.pacman.y][self.pacman.x] = "P "
+        print("\n".join("".join(row) for row in rows))
         print("\n")
 
     # Observation for RL
     def get_observation(self):
-        # Use a proper numpy 2D array
-        obs = np.array(self.map.grid, dtype=int)
+        """
+        Observation in the env's obs_mode; for the default "grid" mode an
+        (H, W) uint8 grid: 0 = empty, 1 = wall, 2 = dot, 3 = ghost, 4 = Pac-Man.
+        Written into a buffer owned by the env, so the array is overwritten
+        by the next step/reset; copy it if you need to keep it.
+        """
+        if self.obs_mode != "grid":
+            if self._obs_builder.buffer is None:
+                return None
+            self._pacman_batch[0] = (self.pacman.x, self.pacman.y)
+            return self._obs_builder.build(self._grid_batch, self._pacman_batch,
+                                           self._ghost_batch)[0]
+
+        obs = self._obs
+        np.copyto(obs, self.map.grid)
         # Pac-Man mark
-        obs[self.pacman.y][self.pacman.x] = 4
-        # Ghost(s) mark
-        for g in self.ghosts:
-            obs[g.y][g.x] = 3
+        obs[self.pacman.y, self.pacman.x] = 4
+        # Ghost(s) mark (a plain loop beats fancy indexing for a few ghosts)
+        for x, y in self._ghost_xy:
+            obs[y, x] = 3
         return obs
@@ -1,4 +1,16 @@
 import heapq
+from collections import deque
+
+import numpy as np
+
+# Layouts with more open cells than this skip the all-pairs table
+# (it is quadratic in memory) and fall back to A* searches.
+MAX_ORACLE_CELLS = 4096
+
+# Shared tables, keyed by wall layout, so every env on the same maze reuses one.
+_ORACLE_CACHE = {}
+_GRAPH_CACHE = {}
+_PLAYABLE_CACHE = {}
 
 def heuristic(a, b):
     # Manhattan distance
@@ -13,37 +25,691 @@ def get_neighbors(map_obj, node):
             neighbors.append((nx, ny))
     return neighbors
 
-def a_star_path(map_obj, start, goal):
+def a_star_path(map_obj, start, goal, first_step_only=False):
     """
     Returns full path as list from start to goal using A*.
     If no path exists, returns None.
+    With first_step_only=True, returns only the tile after start
+    (None if start == goal or there is no path).
+
+    Runs on the map's GridGraph: integer cells, precomputed neighbours,
+    reused score arrays and a closed set. Ties are broken exactly like
+    the original (f, (x, y)) heap, so paths are unchanged.
     """
-    open_set = []
-    heapq.heappush(open_set, (0, start))
+    if start == goal:
+        return None if first_step_only else [start]
 
-    came_from = {}
-    g_score = {start: 0}
+    graph = map_obj.grid_graph()
+    s, t = graph.cell_id(start), graph.cell_id(goal)
+    if s < 0 or t < 0:
+        return None  # walls / off-map are never reachable
 
-    while open_set:
-        _, current = heapq.heappop(open_set)
+    size = graph.size
+    xs, ys, neighbors = graph.xs, graph.ys, graph.neighbors
+    g_score, seen, closed, came_from = graph.g_score, graph.seen, graph.closed, graph.came_from
+    sid = graph.new_search()
+    gx, gy = goal
+
+    g_score[s] = 0
+    seen[s] = sid
+    came_from[s] = -1
+    # Heap keys pack (f, cell) into one int; cell ids are x-major so this
+    # orders like the old (f, (x, y)) tuples
+    open_set = [s]
+    expanded = 0
 
-        if current == goal:
-            return reconstruct_path(came_from, start, goal)
+    while open_set:
+        current = heapq.heappop(open_set) % size
+        if closed[current] == sid:
+            continue  # stale duplicate entry
+        if current == t:
+            graph.expansions += expanded
+            return graph.trace(s, t, first_step_only)
+        closed[current] = sid
+        expanded += 1
 
-        for neighbor in get_neighbors(map_obj, current):
-            temp_g = g_score[current] + 1
-            if neighbor not in g_score or temp_g < g_score[neighbor]:
-                g_score[neighbor] = temp_g
-                f_score = temp_g + heuristic(neighbor, goal)
-                heapq.heappush(open_set, (f_score, neighbor))
-                came_from[neighbor] = current
+        temp_g = g_score[current] + 1
+        for nb in neighbors[current]:
+            if seen[nb] != sid or temp_g < g_score[nb]:
+                g_score[nb] = temp_g
+                seen[nb] = sid
+                came_from[nb] = current
+                f_score = temp_g + abs(xs[nb] - gx) + abs(ys[nb] - gy)
+                heapq.heappush(open_set, f_score * size + nb)
 
+    graph.expansions += expanded
     return None  # no valid path found
 
-def reconstruct_path(came_from, start, goal):
-    node = goal
-    path = [node]
-    while node != start:
-        node = came_from[node]
-        path.append(node)
-    return list(reversed(path))
+def bfs_path(map_obj, start, goal, first_step_only=False):
+    """Breadth-first version of a_star_path (same return values)."""
+    if start == goal:
+        return None if first_step_only else [start]
+
+    graph = map_obj.grid_graph()
+    s, t = graph.cell_id(start), graph.cell_id(goal)
+    if s < 0 or t < 0:
+        return None
+
+    neighbors, seen, came_from = graph.neighbors, graph.seen, graph.came_from
+    sid = graph.new_search()
+    seen[s] = sid
+    came_from[s] = -1
+    queue = deque([s])
+    while queue:
+        current = queue.popleft()
+        for nb in neighbors[current]:
+            if seen[nb] != sid:
+                seen[nb] = sid
+                came_from[nb] = current
+                if nb == t:
+                    return graph.trace(s, t, first_step_only)
+                queue.append(nb)
+    return None
+
+
+# -------------------------------
+# FLAT GRID GRAPH FOR SEARCHES
+# -------------------------------
+class GridGraph:
+    """
+    Adjacency table for a wall layout, plus scratch arrays reused by every
+    search on it. Cells are ids x * height + y (x-major, so id order
+    matches (x, y) tuple order); `neighbors[c]` lists open neighbours in
+    get_neighbors order and is empty for walls.
+
+    Scores are only valid where `seen[c]` equals the current search id,
+    so nothing has to be cleared between searches.
+    """
+
+    def __init__(self, map_obj):
+        self.width = map_obj.width
+        self.height = map_obj.height
+        h = self.height
+        self.size = self.width * h
+
+        self.xs = [c // h for c in range(self.size)]
+        self.ys = [c % h for c in range(self.size)]
+        self.is_open = [not map_obj.is_wall(self.xs[c], self.ys[c]) for c in range(self.size)]
+        self.neighbors = [()] * self.size
+        for c in range(self.size):
+            if self.is_open[c]:
+                self.neighbors[c] = tuple(nx * h + ny
+                                          for nx, ny in get_neighbors(map_obj, (self.xs[c], self.ys[c])))
+
+        self.g_score = [0] * self.size
+        self.came_from = [-1] * self.size
+        self.seen = [0] * self.size
+        self.closed = [0] * self.size
+        self.search_id = 0
+
+        # Cells closed by a_star_path so far (read by profiling.Profiler)
+        self.expansions = 0
+
+    def cell_id(self, pos):
+        """Cell id of an open (x, y) tile, or -1 for walls / off-map."""
+        x, y = pos
+        if x < 0 or x >= self.width or y < 0 or y >= self.height:
+            return -1
+        c = x * self.height + y
+        return c if self.is_open[c] else -1
+
+    def new_search(self):
+        self.search_id += 1
+        return self.search_id
+
+    def trace(self, s, t, first_step_only=False):
+        """Walk came_from back from t to s (path list, or just the step after s)."""
+        came_from, xs, ys = self.came_from, self.xs, self.ys
+        c = t
+        if first_step_only:
+            while came_from[c] != s:
+                c = came_from[c]
+            return (xs[c], ys[c])
+        path = []
+        while c != -1:
+            path.append((xs[c], ys[c]))
+            c = came_from[c]
+        path.reverse()
+        return path
+
+
+# -------------------------------
+# ALL-PAIRS DISTANCE ORACLE
+# -------------------------------
+class DistanceOracle:
+    """
+    Precomputed shortest paths between every pair of open cells.
+
+    Built once per wall layout with a BFS from every open cell:
+        dist[a, b]     -> maze distance from cell a to cell b
+        next_hop[a, b] -> cell to step onto from a to get one tile closer to b
+    Cells are numbered by `index` (flat y * width + x -> open cell id, -1 = wall)
+    and `cells[i]` holds the (x, y) of open cell i.
+
+    Where several first steps are equally short, next_hop takes the first
+    neighbour in get_neighbors order (left, right, up, down) that is one
+    tile closer to b. first_moves() breaks ties the same way without the
+    table; a_star_path's (f, (x, y)) order can pick a different one of
+    the equally short routes.
+    """
+
+    UNREACHABLE = np.iinfo(np.uint16).max
+
+    # Rows of next_hop filled per vectorized pass (bounds the temporaries)
+    _HOP_BLOCK = 256
+
+    def __init__(self, map_obj):
+        self.width = map_obj.width
+        self.height = map_obj.height
+
+        cells = [(x, y)
+                 for y in range(self.height)
+                 for x in range(self.width)
+                 if not map_obj.is_wall(x, y)]
+        n = len(cells)
+        self.cells = np.array(cells, dtype=np.int32).reshape(n, 2)
+
+        self.index = np.full(self.width * self.height, -1, dtype=np.int32)
+        for i, (x, y) in enumerate(cells):
+            self.index[y * self.width + x] = i
+        self.flat_cells = self.cells[:, 1] * self.width + self.cells[:, 0]
+
+        # Plain-list copies for scalar lookups (numpy item access is slower)
+        index = self.index.tolist()
+        self._index = index
+        self._cell_tuples = cells
+        neighbors = []
+        for x, y in cells:
+            neighbors.append([index[ny * self.width + nx]
+                              for nx, ny in get_neighbors(map_obj, (x, y))])
+
+        self.dist = np.full((n, n), self.UNREACHABLE, dtype=np.uint16)
+
+        # BFS rooted at each target fills one column of the distance table
+        for root in range(n):
+            dist_col = [self.UNREACHABLE] * n
+            dist_col[root] = 0
+            queue = deque([root])
+            while queue:
+                u = queue.popleft()
+                du = dist_col[u] + 1
+                for v in neighbors[u]:
+                    if dist_col[v] == self.UNREACHABLE:
+                        dist_col[v] = du
+                        queue.append(v)
+            self.dist[:, root] = dist_col
+
+        self.next_hop = self._next_hops(neighbors)
+
+    def _next_hops(self, neighbors):
+        """next_hop table from dist: -1 where unreachable, a cell's hop to itself is itself."""
+        n = len(neighbors)
+        # (n, 4) neighbour ids in get_neighbors order, padded with the cell itself
+        # (a cell is never one step closer to anything than itself)
+        slots = np.array([nbs + [a] * (4 - len(nbs)) for a, nbs in enumerate(neighbors)],
+                         dtype=np.int64).reshape(n, 4)
+        next_hop = np.full((n, n), -1, dtype=np.int16)
+        for lo in range(0, n, self._HOP_BLOCK):
+            rows = slice(lo, lo + self._HOP_BLOCK)
+            want = self.dist[rows].astype(np.int32) - 1
+            hops = next_hop[rows]
+            # Last slot first, so the earliest matching neighbour wins
+            for k in range(3, -1, -1):
+                nb = slots[rows, k]
+                closer = self.dist[nb] == want
+                hops[closer] = np.broadcast_to(nb[:, None], want.shape)[closer]
+        np.fill_diagonal(next_hop, np.arange(n))
+        return next_hop
+
+    def cell_id(self, pos):
+        """Open cell id of an (x, y) position, or -1 for walls / off-map."""
+        x, y = pos
+        if x < 0 or x >= self.width or y < 0 or y >= self.height:
+            return -1
+        return self._index[y * self.width + x]
+
+    def distance(self, start, goal):
+        """Maze distance from start to goal, or None if unreachable."""
+        a, b = self.cell_id(start), self.cell_id(goal)
+        if a < 0 or b < 0:
+            return None
+        d = int(self.dist[a, b])
+        return None if d == self.UNREACHABLE else d
+
+    def next_step(self, start, goal):
+        """First tile on a shortest path start -> goal (None if already there or unreachable)."""
+        a, b = self.cell_id(start), self.cell_id(goal)
+        if a < 0 or b < 0 or a == b:
+            return None
+        hop = int(self.next_hop[a, b])
+        if hop < 0:
+            return None
+        return self._cell_tuples[hop]
+
+    def path(self, start, goal):
+        """Full path as a list of tiles, same shape as a_star_path (None if unreachable)."""
+        if self.distance(start, goal) is None:
+            return None
+        path = [start]
+        node = start
+        while node != goal:
+            node = self.next_step(node, goal)
+            path.append(node)
+        return path
+
+
+def layout_key(map_obj):
+    """Hashable key for the wall layout of map_obj."""
+    walls = bytes(
+        1 if map_obj.is_wall(x, y) else 0
+        for y in range(map_obj.height)
+        for x in range(map_obj.width)
+    )
+    return (map_obj.width, map_obj.height, walls)
+
+
+def get_distance_oracle(map_obj):
+    """
+    Shared DistanceOracle for the wall layout of map_obj.
+    Returns None when the layout has too many open cells for an all-pairs table.
+    """
+    key = layout_key(map_obj)
+    if key not in _ORACLE_CACHE:
+        walls = key[2]
+        open_cells = len(walls) - sum(walls)
+        if open_cells > MAX_ORACLE_CELLS:
+            _ORACLE_CACHE[key] = None
+        else:
+            _ORACLE_CACHE[key] = DistanceOracle(map_obj)
+    return _ORACLE_CACHE[key]
+
+
+def get_grid_graph(map_obj):
+    """Shared GridGraph for the wall layout of map_obj."""
+    key = layout_key(map_obj)
+    if key not in _GRAPH_CACHE:
+        _GRAPH_CACHE[key] = GridGraph(map_obj)
+    return _GRAPH_CACHE[key]
+
+
+def next_step_toward(map_obj, start, goal):
+    """
+    Next tile on a shortest path from start to goal, or None if there is
+    no move to make. Uses the map's distance oracle when it has one.
+    """
+    oracle = map_obj.distance_oracle()
+    if oracle is not None:
+        return oracle.next_step(start, goal)
+
+    return a_star_path(map_obj, start, goal, first_step_only=True)
+
+
+# -------------------------------
+# BATCHED MULTI-GOAL QUERIES
+# -------------------------------
+def first_moves(map_obj, starts, goals):
+    """
+    Answer many (start, goal) shortest-path queries against one map snapshot.
+
+    Returns (moves, dists) arrays: moves[k] is the (x, y) of the first step
+    from starts[k] toward goals[k], or (-1, -1) if there is no move to make;
+    dists[k] is the maze distance, or -1 if unreachable.
+
+    With the distance oracle this is a single vectorized table gather.
+    Otherwise queries are grouped so that each unique goal costs one BFS,
+    however many queries share it. Either way the move is the first
+    neighbour in get_neighbors order that is one tile closer to the goal
+    (the DistanceOracle tie-break), so both branches agree.
+    """
+    starts = np.asarray(starts, dtype=np.int64).reshape(-1, 2)
+    goals = np.asarray(goals, dtype=np.int64).reshape(-1, 2)
+    moves = np.full((len(starts), 2), -1, dtype=np.int64)
+    dists = np.full(len(starts), -1, dtype=np.int64)
+    if len(starts) == 0:
+        return moves, dists
+
+    oracle = map_obj.distance_oracle()
+    if oracle is not None:
+        s_ids = _oracle_ids(oracle, starts)
+        g_ids = _oracle_ids(oracle, goals)
+        ok = (s_ids >= 0) & (g_ids >= 0)
+        d = oracle.dist[s_ids[ok], g_ids[ok]].astype(np.int64)
+        reachable = d != DistanceOracle.UNREACHABLE
+        dists[np.flatnonzero(ok)[reachable]] = d[reachable]
+
+        step = ok.copy()
+        step[ok] = reachable & (d > 0)
+        hops = oracle.next_hop[s_ids[step], g_ids[step]].astype(np.int64)
+        moves[step] = oracle.cells[hops]
+        return moves, dists
+
+    graph = map_obj.grid_graph()
+    start_list = [tuple(p) for p in starts.tolist()]
+    goal_list = [tuple(p) for p in goals.tolist()]
+
+    neighbors, seen, g_score = graph.neighbors, graph.seen, graph.g_score
+
+    groups = {}
+    for k, goal in enumerate(goal_list):
+        groups.setdefault(goal, []).append(k)
+
+    # One BFS out from each goal. It runs until every start is labelled, and
+    # by then every cell one tile closer than a start is labelled as well.
+    for goal, queries in groups.items():
+        r = graph.cell_id(goal)
+        if r < 0:
+            continue
+        targets = {graph.cell_id(start_list[k]) for k in queries} - {-1}
+        _bfs_distances(graph, r, targets)
+        sid = graph.search_id
+        for k in queries:
+            c = graph.cell_id(start_list[k])
+            if c < 0 or seen[c] != sid:
+                continue
+            d = g_score[c]
+            dists[k] = d
+            if d == 0:
+                continue
+            for nb in neighbors[c]:
+                if seen[nb] == sid and g_score[nb] == d - 1:
+                    moves[k] = (graph.xs[nb], graph.ys[nb])
+                    break
+
+    return moves, dists
+
+
+def _oracle_ids(oracle, positions):
+    x, y = positions[:, 0], positions[:, 1]
+    inside = (x >= 0) & (x < oracle.width) & (y >= 0) & (y < oracle.height)
+    ids = np.full(len(positions), -1, dtype=np.int64)
+    ids[inside] = oracle.index[y[inside] * oracle.width + x[inside]]
+    return ids
+
+
+def _bfs_distances(graph, root, targets):
+    """BFS from root into graph.g_score until every cell in targets is reached."""
+    neighbors, seen, g_score = graph.neighbors, graph.seen, graph.g_score
+    sid = graph.new_search()
+    seen[root] = sid
+    g_score[root] = 0
+    remaining = len(targets - {root})
+    queue = deque([root])
+    while queue and remaining:
+        current = queue.popleft()
+        d = g_score[current] + 1
+        for nb in neighbors[current]:
+            if seen[nb] != sid:
+                seen[nb] = sid
+                g_score[nb] = d
+                if nb in targets:
+                    remaining -= 1
+                queue.append(nb)
+
+
+# -------------------------------
+# INCREMENTAL PATH PLANNER
+# -------------------------------
+class IncrementalPathPlanner:
+    """
+    A* planner for one mover (e.g. a ghost) that keeps its last path and
+    repairs it while the goal stays put or drifts by a tile:
+        goal unchanged               -> keep following the cached path
+        goal moved onto the path     -> trim the path there
+        goal moved to an adjacent tile -> extend the path by that tile
+    Anything else (mover left the path, goal jumped, or max_repairs
+    extensions since the last full search) triggers a fresh A*.
+    `hits` counts reused/repaired queries, `misses` full replans.
+    """
+
+    def __init__(self, map_obj, max_repairs=4):
+        self.map = map_obj
+        self.max_repairs = max_repairs
+        self.hits = 0
+        self.misses = 0
+        self.reset()
+
+    def reset(self):
+        self.path = None
+        self.goal = None
+        self.repairs = 0
+
+    def next_step(self, start, goal):
+        """Next tile from start toward goal, or None if there is no move to make."""
+        path = self._repair(start, goal)
+        if path is None:
+            self.misses += 1
+            found = a_star_path(self.map, start, goal)
+            path = deque(found) if found else None
+            self.repairs = 0
+        else:
+            self.hits += 1
+
+        self.path = path
+        self.goal = goal
+        if path and len(path) > 1:
+            return path[1]
+        return None
+
+    def _repair(self, start, goal):
+        path = self.path
+        if not path:
+            return None
+
+        # The mover is where the path starts, or one tile along it
+        if path[0] != start:
+            if len(path) > 1 and path[1] == start:
+                path.popleft()
+            else:
+                return None
+
+        if goal == self.goal:
+            return path
+
+        # Goal stepped back along the path: drop the tail
+        if goal in path:
+            while path[-1] != goal:
+                path.pop()
+            return path
+
+        # Goal stepped to a neighbouring tile: walk one more tile
+        if (self.repairs < self.max_repairs
+                and heuristic(goal, path[-1]) == 1
+                and not self.map.is_wall(*goal)):
+            self.repairs += 1
+            path.append(goal)
+            return path
+
+        return None
+
+
+# -------------------------------
+# MULTI-SOURCE DISTANCE FIELDS
+# -------------------------------
+# Field values: -1 for walls, FIELD_UNREACHED for open cells no source can reach
+FIELD_UNREACHED = np.iinfo(np.int32).max
+
+def distance_field(map_obj, sources):
+    """
+    (height, width) int32 array of maze distance from every cell to the
+    nearest of `sources`. One table reduction with the oracle, otherwise a
+    single multi-source BFS, so the cost does not grow with len(sources).
+    """
+    w, h = map_obj.width, map_obj.height
+
+    oracle = map_obj.distance_oracle()
+    if oracle is not None:
+        field = np.full(w * h, -1, dtype=np.int32)
+        ids = [i for i in (oracle.cell_id(pos) for pos in sources) if i >= 0]
+        if ids:
+            nearest = oracle.dist[ids].min(axis=0).astype(np.int32)
+            nearest[nearest == DistanceOracle.UNREACHABLE] = FIELD_UNREACHED
+        else:
+            nearest = np.full(len(oracle.cells), FIELD_UNREACHED, dtype=np.int32)
+        field[oracle.flat_cells] = nearest
+        return field.reshape(h, w)
+
+    # BFS over the flat GridGraph (ids are x-major: x * height + y)
+    graph = map_obj.grid_graph()
+    neighbors = graph.neighbors
+    dist = [-1] * graph.size
+    queue = deque()
+    for pos in sources:
+        c = graph.cell_id(pos)
+        if c >= 0 and dist[c] < 0:
+            dist[c] = 0
+            queue.append(c)
+    while queue:
+        c = queue.popleft()
+        d = dist[c] + 1
+        for nb in neighbors[c]:
+            if dist[nb] < 0:
+                dist[nb] = d
+                queue.append(nb)
+
+    field = np.array(dist, dtype=np.int32).reshape(w, h).T.copy()
+    field[(field < 0) & (map_obj.grid != 1)] = FIELD_UNREACHED
+    return field
+
+
+def get_playable_mask(map_obj):
+    """
+    Shared read-only (height, width) bool mask of the cells connected to
+    map_obj's Pac-Man start, i.e. every tile Pac-Man can ever stand on.
+    """
+    key = (layout_key(map_obj), tuple(map_obj.start_pos))
+    if key not in _PLAYABLE_CACHE:
+        field = distance_field(map_obj, [map_obj.start_pos])
+        mask = (field >= 0) & (field != FIELD_UNREACHED)
+        mask.flags.writeable = False
+        _PLAYABLE_CACHE[key] = mask
+    return _PLAYABLE_CACHE[key]
+
+
+# -------------------------------
+# NEAREST-DOT DISTANCE FIELD
+# -------------------------------
+class DotDistanceField:
+    """
+    Maze distance from every open cell to its nearest remaining dot.
+
+    Built with one multi-source BFS from all dots, then repaired locally
+    when a dot is eaten: only the cells that were closest to that dot are
+    invalidated and re-filled from their still-valid neighbours.
+    Cells are flat ids (y * width + x); `source[c]` is the dot cell that
+    `dist[c]` measures to.
+    """
+
+    INF = 1 << 30
+
+    def __init__(self, map_obj, dots):
+        self.width = map_obj.width
+        self.height = map_obj.height
+        w = self.width
+
+        size = self.width * self.height
+        self.neighbors = [()] * size
+        for y in range(self.height):
+            for x in range(w):
+                if not map_obj.is_wall(x, y):
+                    self.neighbors[y * w + x] = tuple(
+                        ny * w + nx for nx, ny in get_neighbors(map_obj, (x, y)))
+
+        self.dist = [self.INF] * size
+        self.source = [-1] * size
+
+        # Row-major seeding keeps ties deterministic
+        queue = deque()
+        for x, y in sorted(dots, key=lambda pos: (pos[1], pos[0])):
+            c = y * w + x
+            self.dist[c] = 0
+            self.source[c] = c
+            queue.append(c)
+        self._bfs(queue)
+
+    def copy(self):
+        """Independent copy (the neighbour table is shared, it never changes)."""
+        field = DotDistanceField.__new__(DotDistanceField)
+        field.width, field.height = self.width, self.height
+        field.neighbors = self.neighbors
+        field.dist = self.dist[:]
+        field.source = self.source[:]
+        return field
+
+    def _bfs(self, queue):
+        dist, source, neighbors = self.dist, self.source, self.neighbors
+        while queue:
+            u = queue.popleft()
+            du = dist[u] + 1
+            for v in neighbors[u]:
+                if dist[v] > du:
+                    dist[v] = du
+                    source[v] = source[u]
+                    queue.append(v)
+
+    def remove_dot(self, x, y):
+        """Drop the dot at (x, y) and repair the cells that pointed at it."""
+        d = y * self.width + x
+        if self.source[d] != d:
+            return
+        dist, source, neighbors = self.dist, self.source, self.neighbors
+
+        # Cells closest to this dot form a connected region around it
+        region = [d]
+        source[d] = -1
+        for u in region:
+            for v in neighbors[u]:
+                if source[v] == d:
+                    source[v] = -1
+                    region.append(v)
+        for u in region:
+            dist[u] = self.INF
+
+        # Re-fill the region from its boundary (unit weights, Dijkstra order)
+        frontier = []
+        for u in region:
+            for v in neighbors[u]:
+                if source[v] >= 0 and dist[v] + 1 < dist[u]:
+                    dist[u] = dist[v] + 1
+                    source[u] = source[v]
+            if source[u] >= 0:
+                frontier.append((dist[u], u))
+        heapq.heapify(frontier)
+
+        while frontier:
+            du, u = heapq.heappop(frontier)
+            if du != dist[u]:
+                continue
+            for v in neighbors[u]:
+                if dist[v] > du + 1:
+                    dist[v] = du + 1
+                    source[v] = source[u]
+                    heapq.heappush(frontier, (du + 1, v))
+
+    def distance(self, pos):
+        """Maze distance from pos to the nearest dot, or None if no dot is reachable."""
+        x, y = pos
+        d = self.dist[y * self.width + x]
+        return None if d >= self.INF else d
+
+    def nearest(self, start):
+        """
+        Return (dot, next_pos): the truly nearest dot and the first tile on a
+        shortest path to it. next_pos is None when start is on the dot itself;
+        both are None when no dot is reachable.
+        """
+        x, y = start
+        w = self.width
+        c = y * w + x
+        src = self.source[c]
+        if src < 0:
+            return None, None
+        dot = (src % w, src // w)
+        if self.dist[c] == 0:
+            return dot, None
+
+        # Descend the field along the neighbour that leads to the same dot
+        target = self.dist[c] - 1
+        for v in self.neighbors[c]:
+            if self.dist[v] == target and self.source[v] == src:
+                return dot, (v % w, v // w)
+        return dot, None
@@ -0,0 +1,31 @@
+import numpy as np
+
+
+def spawn_seeds(seed, n):
+    """
+    n independent child seeds derived from `seed` (int, SeedSequence or None).
+    Give one to each env, agent or worker so their streams never collide.
+    """
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    return seed.spawn(n)
+
+
+def seed_sequence(seed):
+    """seed (int, SeedSequence or None) as a SeedSequence; None draws fresh OS entropy."""
+    if isinstance(seed, np.random.SeedSequence):
+        return seed
+    return np.random.SeedSequence(seed)
+
+
+def seed_sequence_state(seq):
+    """JSON-serializable record of a SeedSequence; seed_sequence_from_state rebuilds it."""
+    entropy = seq.entropy
+    return {"entropy": entropy if isinstance(entropy, int) else list(entropy),
+            "spawn_key": list(seq.spawn_key),
+            "n_children_spawned": seq.n_children_spawned}
+
+
+def seed_sequence_from_state(state):
+    return np.random.SeedSequence(state["entropy"], spawn_key=tuple(state["spawn_key"]),
+                                  n_children_spawned=state["n_children_spawned"])
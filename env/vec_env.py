@@ -0,0 +1,221 @@
+import numpy as np
+from .game_map import GameMap
+from .observations import ObservationBuilder, check_obs_mode
+from .ghosts import (CHASE, SCATTER, chase_targets, ghost_personalities,
+                     initial_mode_timers, scatter_corners, snap_table, snap_targets,
+                     update_modes)
+from .pathfinding import IncrementalPathPlanner, first_moves
+from .seeding import spawn_seeds
+
+
+class PacmanVecEnv:
+    """
+    N independent Pac-Man games stepped together with NumPy.
+
+    Boards live in one stacked (N, H, W) uint8 array, entity positions in
+    (N, 2) / (N, G, 2) arrays of (x, y) and ghost modes/timers in (N, G). step(actions) applies the same rules
+    as PacmanEnv.step to every game at once; finished games are reset
+    automatically and their final observation is returned in `info`.
+
+    Game i draws from its own Generator seeded with spawn_seeds(seed, N)[i],
+    so it replays exactly like PacmanEnv(seed=spawn_seeds(seed, N)[i]).
+    """
+
+    # Same action encoding as PacmanEnv: 0=up, 1=down, 2=left, 3=right
+    ACTION_DELTAS = np.array([(0, -1), (0, 1), (-1, 0), (1, 0)], dtype=np.int64)
+
+    def __init__(self, num_envs, ghost_mode="mixed", seed=None, num_ghosts=1,
+                 obs_mode="grid", view_radius=5, layout=None):
+        self.num_envs = num_envs
+        self.ghost_mode_setting = ghost_mode
+        self.rngs = [np.random.default_rng(s) for s in spawn_seeds(seed, num_envs)]
+
+        self.map = GameMap(layout)
+        self.width, self.height = self.map.width, self.map.height
+
+        self._template = self.map.grid.copy()
+        self._walls = self._template == 1
+        self._template_dots = int(np.count_nonzero(self._template == 2))
+
+        self._start = np.array(self.map.start_pos, dtype=np.int64)
+        starts = self.map.ghost_starts
+        if not 1 <= num_ghosts <= len(starts):
+            raise ValueError(f"num_ghosts must be between 1 and {len(starts)}, got {num_ghosts}")
+        self.num_ghosts = num_ghosts
+        self._ghost_starts = np.array(starts[:num_ghosts], dtype=np.int64)
+        self._initial_timers = initial_mode_timers(num_ghosts)
+        self.ghost_personality = ghost_personalities(num_ghosts)
+        self.scatter_targets = scatter_corners(self.map, num_ghosts)
+        self._snap = snap_table(self.map)
+
+        # Per-game, per-ghost cached A* paths for layouts too large for the
+        # oracle (as in PacmanEnv, so every game replays like it)
+        self._planners = [[IncrementalPathPlanner(self.map) for _ in range(num_ghosts)]
+                          for _ in range(num_envs)]
+
+        # Non-wall neighbours of every cell, in action order, for random ghost moves
+        self._open_moves = [[(x + dx, y + dy) for dx, dy in self.ACTION_DELTAS.tolist()
+                             if not self.map.is_wall(x + dx, y + dy)]
+                            for y in range(self.height) for x in range(self.width)]
+
+        n, g = num_envs, self.num_ghosts
+        self.grids = np.empty((n, self.height, self.width), dtype=np.uint8)
+        self.pacman = np.empty((n, 2), dtype=np.int64)
+        self.pacman_dir = np.empty((n, 2), dtype=np.int64)
+        self.ghosts = np.empty((n, g, 2), dtype=np.int64)
+        self.ghost_modes = np.empty((n, g), dtype=np.int64)
+        self.ghost_timers = np.empty((n, g), dtype=np.int64)
+        self.dots_left = np.empty(n, dtype=np.int64)
+
+        # Running episode stats, reported in info when a game finishes
+        self.episode_reward = np.zeros(n, dtype=np.int64)
+        self.episode_length = np.zeros(n, dtype=np.int64)
+
+        check_obs_mode(obs_mode)
+        self.obs_mode = obs_mode
+        self._obs_builder = ObservationBuilder(obs_mode, self.map, g, n, view_radius)
+        self._rows = np.arange(n)
+
+    # -------------------------------
+    # RESET
+    # -------------------------------
+    def reset(self, seed=None):
+        if seed is not None:
+            self.rngs = [np.random.default_rng(s) for s in spawn_seeds(seed, self.num_envs)]
+        self._reset_games(self._rows)
+        return self.get_observation()
+
+    def _reset_games(self, idx):
+        self.grids[idx] = self._template
+        self.pacman[idx] = self._start
+        self.pacman_dir[idx] = 0
+        self.ghosts[idx] = self._ghost_starts
+        self.ghost_modes[idx] = SCATTER
+        self.ghost_timers[idx] = self._initial_timers
+        self.dots_left[idx] = self._template_dots
+        self.episode_reward[idx] = 0
+        self.episode_length[idx] = 0
+        for i in np.atleast_1d(idx).tolist():
+            for planner in self._planners[i]:
+                planner.reset()
+
+    # -------------------------------
+    # STEP
+    # -------------------------------
+    def step(self, actions):
+        """
+        Advance every game by one move.
+        Returns (obs, rewards, dones, info) with a leading N axis.
+        """
+        actions = np.asarray(actions, dtype=np.int64)
+        rows = self._rows
+        rewards = np.zeros(self.num_envs, dtype=np.int64)
+
+        # ---------- Pac-Man movement ----------
+        self.pacman_dir[:] = self.ACTION_DELTAS[actions]
+        moved = self.pacman + self.pacman_dir
+        blocked = self._is_wall(moved)
+        rewards[blocked] -= 2
+        self.pacman[~blocked] = moved[~blocked]
+
+        # Collect dot (2 = dot), only on the tile Pac-Man just moved onto
+        px, py = self.pacman[:, 0], self.pacman[:, 1]
+        ate = (self.grids[rows, py, px] == 2) & ~blocked
+        self.grids[rows[ate], py[ate], px[ate]] = 0
+        self.dots_left -= ate
+        rewards += 10 * ate
+
+        # ---------- Ghost mode + movement ----------
+        update_modes(self.ghost_modes, self.ghost_timers, self.ghost_mode_setting)
+        self._move_ghosts()
+
+        # ---------- Collisions ----------
+        caught = np.all(self.ghosts == self.pacman[:, None, :], axis=2).any(axis=1)
+        rewards[caught] -= 100
+
+        # ---------- Win condition ----------
+        won = self.dots_left == 0
+        rewards[won] += 200
+
+        dones = caught | won
+        self.episode_reward += rewards
+        self.episode_length += 1
+
+        obs = self.get_observation()
+        info = {}
+        if dones.any():
+            finished = np.flatnonzero(dones)
+            if obs is not None:
+                info["final_observation"] = obs[finished].copy()
+            info["final_index"] = finished
+            info["episode_reward"] = self.episode_reward[finished].copy()
+            info["episode_length"] = self.episode_length[finished].copy()
+            self._reset_games(finished)
+            obs = self.get_observation()
+
+        return obs, rewards, dones, info
+
+    def _is_wall(self, pos):
+        x, y = pos[..., 0], pos[..., 1]
+        inside = (x >= 0) & (x < self.width) & (y >= 0) & (y < self.height)
+        walls = np.ones(x.shape, dtype=bool)
+        walls[inside] = self._walls[y[inside], x[inside]]
+        return walls
+
+    def _move_ghosts(self):
+        """
+        Shortest-path step toward each ghost's target: all games in one
+        table gather with the distance oracle, else each ghost's planner.
+        """
+        chase = chase_targets(self.pacman, self.pacman_dir, self.ghosts,
+                              self.ghost_personality, self.scatter_targets)
+        chase = snap_targets(self._snap, chase)
+        targets = np.where((self.ghost_modes == CHASE)[..., None], chase, self.scatter_targets)
+
+        if self.map.distance_oracle() is not None:
+            moves, _ = first_moves(self.map, self.ghosts.reshape(-1, 2), targets.reshape(-1, 2))
+            moves = moves.reshape(self.ghosts.shape)
+        else:
+            moves = np.full(self.ghosts.shape, -1, dtype=np.int64)
+            for i, (starts, goals) in enumerate(zip(self.ghosts.tolist(), targets.tolist())):
+                for g, planner in enumerate(self._planners[i]):
+                    step = planner.next_step(tuple(starts[g]), tuple(goals[g]))
+                    if step is not None:
+                        moves[i, g] = step
+        can_path = moves[..., 0] >= 0
+        self.ghosts[can_path] = moves[can_path]
+
+        # No good path (or already at target) -> random valid move, as in PacmanEnv
+        for i, g in zip(*np.nonzero(~can_path)):
+            self._ghost_random_move(i, g)
+
+    def _ghost_random_move(self, i, g):
+        x, y = self.ghosts[i, g].tolist()
+        valid_moves = self._open_moves[y * self.width + x]
+        if valid_moves:
+            self.ghosts[i, g] = valid_moves[int(self.rngs[i].random() * len(valid_moves))]
+
+    # -------------------------------
+    # QUERIES
+    # -------------------------------
+    def get_observation(self):
+        """
+        Observations of every game in the env's obs_mode, with a leading N
+        axis (None for "none"). "grid" boards use PacmanEnv's markings
+        (4 = Pac-Man, 3 = ghost). The returned array is reused by the next call.
+        """
+        return self._obs_builder.build(self.grids, self.pacman, self.ghosts)
+
+    def get_valid_actions_mask(self):
+        """(N, 4) bool mask of non-wall moves for each Pac-Man."""
+        moved = self.pacman[:, None, :] + self.ACTION_DELTAS[None, :, :]
+        return ~self._is_wall(moved)
+
+    def get_pacman_positions(self):
+        return self.pacman
+
+    def get_ghost_positions(self):
+        return self.ghosts
+
+    def remaining_dots(self):
+        return self.dots_left
@@ -0,0 +1,252 @@
+# evaluate.py
+"""
+Headless greedy evaluation of a trained Q-table.
+
+    python evaluate.py q_table_search_agent.npy --episodes 1000
+    python evaluate.py q_table_search_agent.npy --episodes 200 --processes 1 --json eval.json
+    python evaluate.py q_table_search_agent.npy --render        # also watch one sampled episode
+    python evaluate.py q_table_search_agent.npy --num-ghosts 4 --layout my_maze.txt
+
+Episodes run with epsilon = 0 and no rendering, spread over a process
+pool. Every worker maps the same Q-table file read-only (mmap), and
+episode i always gets the i-th child of the seed, so results do not
+depend on the number of processes.
+"""
+import argparse
+import json
+import math
+import os
+import time
+from multiprocessing import Pool
+
+import numpy as np
+
+from env.mazes import load_layout
+from env.pacman_env import MAX_EPISODE_STEPS, PacmanEnv
+from env.seeding import spawn_seeds
+from metrics import CAUGHT, TRUNCATED, WON, episode_outcome
+from search_agent import SearchRLAgent
+
+# z for two-sided 95% intervals
+Z_95 = 1.959964
+
+
+def load_agent(q_path=None):
+    """Greedy agent (epsilon = 0) on the table at q_path, mapped read-only; untrained if None."""
+    agent = SearchRLAgent()
+    if q_path is not None:
+        agent.load(q_path, mmap_mode="r")
+    agent.epsilon = 0.0
+    return agent
+
+
+def play_episode(agent, env, episode_seed, max_steps=MAX_EPISODE_STEPS, render=False, delay=0.0):
+    """
+    One greedy episode on env. episode_seed (a SeedSequence) seeds both the
+    env and the agent's tie-break / fallback RNG, so an episode replays
+    exactly. Returns (reward, steps, outcome, dots_eaten).
+    """
+    # Spawn from a copy, so the same episode_seed always replays the same episode
+    fresh = np.random.SeedSequence(episode_seed.entropy, spawn_key=episode_seed.spawn_key)
+    env_seed, agent_seed = fresh.spawn(2)
+    agent.rng = np.random.default_rng(agent_seed)
+    env.reset(seed=env_seed)
+    dots_start = env.map.remaining_dots()
+    state = agent.get_state(env)
+
+    total_reward = 0
+    steps = 0
+    done = False
+    while not done and steps < max_steps:
+        if render:
+            env.render()
+            if delay:
+                time.sleep(delay)
+        high_action = agent.choose_high_level_action(state)
+        action = agent.plan_with_astar(env, high_action)
+        _, reward, done, _ = env.step(action, observe=False)
+        total_reward += reward
+        steps += 1
+        state = agent.get_state(env)
+
+    if render:
+        env.render()
+    return total_reward, steps, episode_outcome(env, done), dots_start - env.map.remaining_dots()
+
+
+# -------------------------------
+# PARALLEL EPISODES
+# -------------------------------
+# Per-process agent and env, built once by _init_worker
+_WORKER = {}
+
+
+def _init_worker(q_path, ghost_mode, max_steps, num_ghosts, layout):
+    _WORKER["agent"] = load_agent(q_path)
+    _WORKER["env"] = PacmanEnv(ghost_mode=ghost_mode, num_ghosts=num_ghosts, layout=layout,
+                               obs_mode="none")
+    _WORKER["max_steps"] = max_steps
+
+
+def _run_episodes(job):
+    """Play a block of episodes; returns (first index, (n, 4) results)."""
+    first, seeds = job
+    agent, env, max_steps = _WORKER["agent"], _WORKER["env"], _WORKER["max_steps"]
+    results = np.array([play_episode(agent, env, s, max_steps) for s in seeds], dtype=np.float64)
+    return first, results.reshape(-1, 4)
+
+
+def run_episodes(q_path, num_episodes, seed=0, processes=None, ghost_mode="mixed",
+                 max_steps=MAX_EPISODE_STEPS, num_ghosts=1, layout=None):
+    """
+    Play num_episodes greedy episodes with num_ghosts ghosts on `layout`
+    (default the arcade board); returns {"reward", "steps", "outcome",
+    "dots_eaten"} arrays indexed by episode.
+    """
+    seeds = spawn_seeds(seed, num_episodes)
+    processes = processes or os.cpu_count() or 1
+    init_args = (q_path, ghost_mode, max_steps, num_ghosts, layout)
+
+    if processes == 1:
+        _init_worker(*init_args)
+        _, results = _run_episodes((0, seeds))
+    else:
+        # A few blocks per process keeps workers busy without per-episode messages
+        block = max(1, math.ceil(num_episodes / (4 * processes)))
+        jobs = [(i, seeds[i:i + block]) for i in range(0, num_episodes, block)]
+        results = np.zeros((num_episodes, 4))
+        with Pool(processes, initializer=_init_worker, initargs=init_args) as pool:
+            for first, part in pool.imap_unordered(_run_episodes, jobs):
+                results[first:first + len(part)] = part
+
+    return {
+        "reward": results[:, 0],
+        "steps": results[:, 1].astype(np.int64),
+        "outcome": results[:, 2].astype(np.int8),
+        "dots_eaten": results[:, 3].astype(np.int64),
+    }
+
+
+# -------------------------------
+# STATISTICS
+# -------------------------------
+def wilson_interval(successes, n, z=Z_95):
+    """Wilson score interval for a binomial proportion (sensible even at 0 or n successes)."""
+    if n == 0:
+        return (0.0, 1.0)
+    p = successes / n
+    denom = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denom
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return (max(0.0, centre - half), min(1.0, centre + half))
+
+
+def mean_interval(values, z=Z_95):
+    """(mean, low, high): normal-approximation interval for the mean; None if no values."""
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 0:
+        return None
+    mean = float(values.mean())
+    if len(values) < 2:
+        return (mean, mean, mean)
+    half = z * float(values.std(ddof=1)) / math.sqrt(len(values))
+    return (mean, mean - half, mean + half)
+
+
+def summarize(episodes):
+    """Report dict for run_episodes() output: rates, means and 95% intervals."""
+    outcome = episodes["outcome"]
+    n = len(outcome)
+    wins = int((outcome == WON).sum())
+    return {
+        "episodes": n,
+        "win_rate": wins / n if n else 0.0,
+        "win_rate_ci": wilson_interval(wins, n),
+        "caught_rate": float((outcome == CAUGHT).mean()) if n else 0.0,
+        "truncated_rate": float((outcome == TRUNCATED).mean()) if n else 0.0,
+        "score": mean_interval(episodes["reward"]),
+        "steps": mean_interval(episodes["steps"]),
+        "steps_to_clear": mean_interval(episodes["steps"][outcome == WON]),
+        "dots_eaten": mean_interval(episodes["dots_eaten"]),
+    }
+
+
+def evaluate(q_path, num_episodes=1000, seed=0, processes=None, ghost_mode="mixed",
+             max_steps=MAX_EPISODE_STEPS, num_ghosts=1, layout=None):
+    t0 = time.perf_counter()
+    episodes = run_episodes(q_path, num_episodes, seed=seed, processes=processes,
+                            ghost_mode=ghost_mode, max_steps=max_steps,
+                            num_ghosts=num_ghosts, layout=layout)
+    report = summarize(episodes)
+    report["seconds"] = time.perf_counter() - t0
+    return report
+
+
+def format_report(report):
+    def interval(stat, fmt="{:.1f}"):
+        if stat is None:
+            return "n/a"
+        mean, low, high = stat
+        return f"{fmt.format(mean)}  [{fmt.format(low)}, {fmt.format(high)}]"
+
+    low, high = report["win_rate_ci"]
+    return "\n".join([
+        f"{report['episodes']} greedy episodes in {report['seconds']:.1f}s",
+        f"win rate        {report['win_rate']:.3f}  [{low:.3f}, {high:.3f}]",
+        f"caught / cut    {report['caught_rate']:.3f} / {report['truncated_rate']:.3f}",
+        f"score           {interval(report['score'])}",
+        f"steps           {interval(report['steps'])}",
+        f"steps to clear  {interval(report['steps_to_clear'])}",
+        f"dots eaten      {interval(report['dots_eaten'])}",
+        "(95% intervals: Wilson for the win rate, normal approximation for means)",
+    ])
+
+
+def render_episode(q_path, episode, seed=0, ghost_mode="mixed", max_steps=MAX_EPISODE_STEPS,
+                   delay=0.2, num_ghosts=1, layout=None):
+    """Replay (and print) evaluation episode `episode` exactly as it was evaluated."""
+    agent = load_agent(q_path)
+    env = PacmanEnv(ghost_mode=ghost_mode, num_ghosts=num_ghosts, layout=layout,
+                    obs_mode="none")
+    episode_seed = spawn_seeds(seed, episode + 1)[episode]
+    return play_episode(agent, env, episode_seed, max_steps, render=True, delay=delay)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("q_table", help="Q-table written by SearchRLAgent.save")
+    parser.add_argument("--episodes", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--processes", type=int, default=None, help="default: one per CPU")
+    parser.add_argument("--ghost-mode", default="mixed", choices=("mixed", "chase", "scatter"))
+    parser.add_argument("--max-steps", type=int, default=MAX_EPISODE_STEPS)
+    parser.add_argument("--num-ghosts", type=int, default=1, choices=(1, 2, 3, 4))
+    parser.add_argument("--layout", metavar="PATH",
+                        help="maze file (see env/mazes.py); default: the arcade board")
+    parser.add_argument("--json", metavar="PATH", help="also write the report as JSON")
+    parser.add_argument("--render", action="store_true",
+                        help="afterwards, watch one randomly sampled episode")
+    parser.add_argument("--delay", type=float, default=0.2, help="seconds between rendered frames")
+    args = parser.parse_args(argv)
+    layout = load_layout(args.layout) if args.layout else None
+
+    report = evaluate(args.q_table, args.episodes, seed=args.seed, processes=args.processes,
+                      ghost_mode=args.ghost_mode, max_steps=args.max_steps,
+                      num_ghosts=args.num_ghosts, layout=layout)
+    print(format_report(report))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.render:
+        episode = int(np.random.default_rng().integers(args.episodes))
+        print(f"----- REPLAYING EPISODE {episode} -----")
+        reward, steps, _, _ = render_episode(args.q_table, episode, seed=args.seed,
+                                             ghost_mode=args.ghost_mode,
+                                             max_steps=args.max_steps, delay=args.delay,
+                                             num_ghosts=args.num_ghosts, layout=layout)
+        print(f"Episode {episode}: reward {reward}, {steps} steps")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,59 +1,213 @@
+import glob
+import itertools
+import json
+import os
+import shutil
+import time
+from multiprocessing import Pool
+
 import matplotlib.pyplot as plt
 import numpy as np
 from search_agent import SearchRLAgent
-from env.pacman_env import PacmanEnv
-
-def run_experiment(num_episodes=200, epsilon_decay=0.995):
-    agent = SearchRLAgent(epsilon_decay=epsilon_decay)
+from env.fileio import atomic_write
+from env.pacman_env import MAX_EPISODE_STEPS, PacmanEnv
+from env.seeding import spawn_seeds
+from metrics import MetricsWriter, episode_outcome
+from profiling import Profiler, profiled
+
+def run_experiment(num_episodes=200, epsilon_decay=0.995, alpha=0.1, gamma=0.95,
+                   ghost_mode="mixed", seed=None, verbose=True, max_steps=MAX_EPISODE_STEPS,
+                   profile=None, metrics=None, print_every=1, num_ghosts=1, layout=None):
+    # One seed tree per run: the agent and every episode's env get their own stream
+    agent_seed, env_seed = spawn_seeds(seed, 2)
+    env_seeds = spawn_seeds(env_seed, num_episodes)
+
+    agent = SearchRLAgent(alpha=alpha, gamma=gamma, epsilon_decay=epsilon_decay, seed=agent_seed)
     rewards_over_time = []
 
-    for ep in range(num_episodes):
-        env = PacmanEnv()
-        obs = env.reset()
+    # One env per run (and so per sweep worker); reset() just restores the board
+    env = PacmanEnv(ghost_mode=ghost_mode, num_ghosts=num_ghosts, layout=layout,
+                    obs_mode="none")
 
-        total_reward = 0
-        done = False
+    # Optional profiling.Profiler: hot-spot timings per episode, next to the rewards
+    with profiled(profile, env, agent):
+        for ep in range(num_episodes):
+            obs = env.reset(seed=env_seeds[ep])
 
-        state = agent.get_state(env)
+            total_reward = 0
+            done = False
+            if metrics is not None:
+                t0 = time.perf_counter()
+                dots_start = env.map.remaining_dots()
 
-        step_count = 0
+            state = agent.get_state(env)
 
-        while not done:
-            # 1. Choose HIGH-LEVEL action (0=chase, 1=avoid)
-            high_action = agent.choose_high_level_action(state)
+            step_count = 0
 
-            # 2. Convert high-level action into primitive (w/a/s/d movement)
-            primitive_action = agent.plan_with_astar(env, high_action)
+            while not done:
+                # 1. Choose HIGH-LEVEL action (0=chase, 1=avoid)
+                high_action = agent.choose_high_level_action(state)
 
-            # 3. Take the step
-            obs, reward, done, _ = env.step(primitive_action)
-            total_reward += reward
-            step_count += 1
+                # 2. Convert high-level action into primitive (w/a/s/d movement)
+                primitive_action = agent.plan_with_astar(env, high_action)
 
-            next_state = agent.get_state(env)
+                # 3. Take the step (the agent reads positions, not the grid)
+                _, reward, done, _ = env.step(primitive_action, observe=False)
+                total_reward += reward
+                step_count += 1
 
-            # 4. Update Q-table (HIGH-LEVEL decision)
-            agent.update_q(state, high_action, reward, next_state, done)
+                next_state = agent.get_state(env)
 
-            # 5. Move to next state
-            state = next_state
+                # 4. Update Q-table (HIGH-LEVEL decision)
+                agent.update_q(state, high_action, reward, next_state, done)
 
-            if step_count > 500:
-                break
+                # 5. Move to next state
+                state = next_state
 
-        # Episode complete
-        rewards_over_time.append(total_reward)
+                if step_count >= max_steps:
+                    break
 
-        # Decay epsilon manually (same as training loop)
-        if agent.epsilon > agent.epsilon_min:
-            agent.epsilon *= agent.epsilon_decay
+            # Episode complete
+            rewards_over_time.append(total_reward)
+            if profile is not None:
+                profile.end_episode(reward=total_reward, steps=step_count)
+            if metrics is not None:
+                # Epsilon the episode was played at (it decays below)
+                metrics.log(ep, total_reward, step_count, agent.epsilon,
+                            time.perf_counter() - t0,
+                            dots_start - env.map.remaining_dots(),
+                            episode_outcome(env, done))
 
-        print(f"[Experiment] Episode {ep+1}/{num_episodes} | Reward: {total_reward:.1f} | ε={agent.epsilon:.3f}")
+            # Decay epsilon manually (same as training loop)
+            if agent.epsilon > agent.epsilon_min:
+                agent.epsilon *= agent.epsilon_decay
+
+            if verbose and (ep + 1) % print_every == 0:
+                print(f"[Experiment] Episode {ep+1}/{num_episodes} | Reward: {total_reward:.1f} | ε={agent.epsilon:.3f}")
 
     return rewards_over_time
 
 
-def plot_results(results):
+# -------------------------------
+# PARALLEL HYPERPARAMETER SWEEPS
+# -------------------------------
+class ResultsStore:
+    """
+    Directory of finished sweep runs.
+    Each run's per-episode rewards go to run_<id>.npy (its profile, if
+    any, to run_<id>_profile.json) and its config is appended to
+    index.jsonl as soon as the run comes back from a worker. Workers write
+    each run's metrics (metrics.MetricsWriter) to run_<id>_metrics/.
+    run_sweep clear()s the store first, so it only ever holds one sweep.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.index_path = os.path.join(path, "index.jsonl")
+
+    def metrics_dir(self, run_id):
+        return os.path.join(self.path, f"run_{run_id:04d}_metrics")
+
+    def clear(self):
+        """Delete the index and every run's rewards, profile and metrics."""
+        if os.path.exists(self.index_path):
+            os.remove(self.index_path)
+        for path in glob.glob(os.path.join(self.path, "run_*")):
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+
+    def add(self, run_id, config, rewards, profile=None):
+        rewards = np.asarray(rewards)
+        atomic_write(os.path.join(self.path, f"run_{run_id:04d}.npy"),
+                     lambda f: np.save(f, rewards))
+        if profile is not None:
+            atomic_write(os.path.join(self.path, f"run_{run_id:04d}_profile.json"),
+                         lambda f: f.write(json.dumps(profile).encode()))
+        with open(self.index_path, "a") as f:
+            f.write(json.dumps({"run_id": run_id, **config}, default=_config_value) + "\n")
+
+    def load(self):
+        """Return [(config, rewards), ...] for every stored run, in run order."""
+        if not os.path.exists(self.index_path):
+            return []
+        configs = {}
+        with open(self.index_path) as f:
+            for line in f:
+                config = json.loads(line)
+                # A run_id logged twice keeps its newest config (its files were overwritten)
+                configs[config.pop("run_id")] = config
+        return [(configs[run_id], np.load(os.path.join(self.path, f"run_{run_id:04d}.npy")))
+                for run_id in sorted(configs)]
+
+
+def _config_value(value):
+    # Layout objects (env/mazes.py) are indexed by name
+    return getattr(value, "name", repr(value))
+
+
+def sweep_configs(grid, seeds=(0,)):
+    """
+    Expand a hyperparameter grid into one config per (combination, seed).
+    grid maps run_experiment keyword names to lists of values, e.g.
+        {"epsilon_decay": [0.995, 0.98], "ghost_mode": ["mixed", "chase"],
+         "num_ghosts": [1, 4], "layout": [None, generate_maze(31, 21, seed=0)]}
+    """
+    keys = sorted(grid)
+    configs = []
+    for values in itertools.product(*(grid[k] for k in keys)):
+        for seed in seeds:
+            configs.append({**dict(zip(keys, values)), "seed": seed})
+    return configs
+
+
+def _sweep_worker(job):
+    run_id, config, num_episodes, profile, metrics_dir = job
+    profiler = Profiler() if profile else None
+    if metrics_dir is None:
+        rewards = run_experiment(num_episodes, verbose=False, profile=profiler, **config)
+    else:
+        with MetricsWriter(metrics_dir) as metrics:
+            rewards = run_experiment(num_episodes, verbose=False, profile=profiler,
+                                     metrics=metrics, **config)
+    return run_id, config, rewards, profiler.to_dict() if profiler else None
+
+
+def run_sweep(grid, seeds=(0,), num_episodes=200, processes=None, results_dir=None,
+              profile=False):
+    """
+    Run every config of the grid in a process pool, one independently
+    seeded agent per run. Results are streamed into a ResultsStore (when
+    results_dir is given) as runs finish, along with each run's
+    per-episode metrics; with profile=True each run is profiled too and
+    its profile stored next to its rewards. A results_dir that already
+    holds a sweep is cleared first.
+    Returns [(config, rewards), ...] in grid order.
+    """
+    configs = sweep_configs(grid, seeds)
+    store = ResultsStore(results_dir) if results_dir else None
+    if store is not None:
+        store.clear()   # run ids restart at 0, so drop the previous sweep's runs
+    jobs = [(run_id, config, num_episodes, profile,
+             store.metrics_dir(run_id) if store is not None else None)
+            for run_id, config in enumerate(configs)]
+
+    results = [None] * len(jobs)
+    with Pool(processes=processes) as pool:
+        for run_id, config, rewards, run_profile in pool.imap_unordered(_sweep_worker, jobs):
+            results[run_id] = (config, rewards)
+            if store is not None:
+                store.add(run_id, config, rewards, run_profile)
+            print(f"[Sweep] Run {run_id+1}/{len(jobs)} done | {config} | "
+                  f"mean reward: {np.mean(rewards):.1f}")
+
+    return results
+
+
+def plot_results(results, out=None):
+    """Smoothed reward curves, one per label; saved to `out` if given, else shown."""
     plt.figure(figsize=(10, 6))
     for label, rewards in results.items():
         smoothed = np.convolve(rewards, np.ones(10)/10, mode='valid')
@@ -64,16 +218,22 @@ def plot_results(results):
     plt.ylabel("Smoothed Reward")
     plt.grid(True)
     plt.legend()
-    plt.show()
+    if out:
+        plt.savefig(out, dpi=120, bbox_inches="tight")
+        plt.close()
+        print(f"Saved {out}")
+    else:
+        plt.show()
 
 
 if __name__ == "__main__":
     print("Running Pac-Man RL Experiments...")
 
-    results = {
-        "ε-decay=0.995": run_experiment(200, epsilon_decay=0.995),
-        "ε-decay=0.980": run_experiment(200, epsilon_decay=0.980),
-        "ε-decay=0.999": run_experiment(200, epsilon_decay=0.999),
-    }
+    sweep = run_sweep({"epsilon_decay": [0.995, 0.980, 0.999]},
+                      seeds=(0,), num_episodes=200,
+                      results_dir="experiment_results")
+
+    results = {f"ε-decay={config['epsilon_decay']:.3f}": rewards
+               for config, rewards in sweep}
 
-    plot_results(results)
+    plot_results(results, out=os.path.join("experiment_results", "epsilon_decay.png"))
@@ -0,0 +1,170 @@
+# metrics.py
+"""
+Per-episode training metrics, written as columnar .npz chunks.
+
+    with MetricsWriter("runs/search_agent") as metrics:
+        agent.train(num_episodes=5000, verbose=False, metrics=metrics)
+    columns = read_metrics("runs/search_agent")    # {"reward": array, ...}
+
+Records are buffered in preallocated column arrays; every chunk_size
+episodes the full chunk goes to a background thread that saves it as
+chunk_<first episode>.npz, so the training loop never waits on disk.
+Plot the files offline with plot_metrics.py.
+"""
+import glob
+import os
+import queue
+import threading
+
+import numpy as np
+
+from env.fileio import atomic_write
+
+# Episode outcomes (the "outcome" column)
+TRUNCATED, WON, CAUGHT = 0, 1, 2
+OUTCOME_NAMES = ("truncated", "won", "caught")
+
+# Column name -> dtype, in file order
+COLUMNS = {
+    "episode": np.int64,
+    "reward": np.float64,
+    "steps": np.int32,
+    "epsilon": np.float64,
+    "seconds": np.float64,
+    "dots_eaten": np.int32,
+    "outcome": np.int8,
+}
+
+
+def episode_outcome(env, done):
+    """WON if the board is clear, CAUGHT if the episode ended otherwise, else TRUNCATED."""
+    if env.map.remaining_dots() == 0:
+        return WON
+    return CAUGHT if done else TRUNCATED
+
+
+class MetricsWriter:
+    """
+    Buffered, asynchronous sink for per-episode records (see COLUMNS).
+    log() is a handful of array stores; flush() hands the buffered rows
+    to the writer thread and close() waits until everything is on disk.
+    """
+
+    def __init__(self, directory, chunk_size=1000):
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size must be at least 1, got {chunk_size}")
+        self.directory = directory
+        self.chunk_size = chunk_size
+        os.makedirs(directory, exist_ok=True)
+
+        self._new_chunk()
+        self._queue = queue.Queue()
+        self._error = None
+        self._thread = threading.Thread(target=self._write_loop, daemon=True)
+        self._thread.start()
+
+    def _new_chunk(self):
+        self._columns = {name: np.zeros(self.chunk_size, dtype=dtype)
+                         for name, dtype in COLUMNS.items()}
+        self._rows = 0
+
+    def log(self, episode, reward, steps, epsilon, seconds, dots_eaten, outcome):
+        i = self._rows
+        columns = self._columns
+        columns["episode"][i] = episode
+        columns["reward"][i] = reward
+        columns["steps"][i] = steps
+        columns["epsilon"][i] = epsilon
+        columns["seconds"][i] = seconds
+        columns["dots_eaten"][i] = dots_eaten
+        columns["outcome"][i] = outcome
+        self._rows = i + 1
+        if self._rows == self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Queue the buffered rows for writing (as one chunk file)."""
+        if self._error is not None:
+            raise self._error
+        if self._rows == 0:
+            return
+        rows = self._rows
+        self._queue.put({name: column[:rows] for name, column in self._columns.items()})
+        self._new_chunk()
+
+    def sync(self):
+        """Flush and wait until every logged row is on disk (e.g. before a checkpoint)."""
+        self.flush()
+        self._queue.join()
+        if self._error is not None:
+            raise self._error
+
+    def truncate(self, episode):
+        """
+        Drop every logged row of episode >= `episode` (buffered rows are
+        flushed first), e.g. rows logged after the checkpoint a run resumes from.
+        """
+        self.sync()
+        for path in chunk_paths(self.directory):
+            with np.load(path) as data:
+                chunk = {name: data[name] for name in COLUMNS}
+            keep = chunk["episode"] < episode
+            if keep.all():
+                continue
+            if keep.any():
+                # Same first episode, so this replaces the file in place
+                _save_chunk(self.directory, {name: column[keep] for name, column in chunk.items()})
+            else:
+                os.remove(path)
+
+    def close(self):
+        """Flush, then block until the writer thread has saved every chunk."""
+        if self._thread is None:
+            return
+        self.sync()
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _write_loop(self):
+        while True:
+            chunk = self._queue.get()
+            if chunk is None:
+                self._queue.task_done()
+                return
+            try:
+                _save_chunk(self.directory, chunk)
+            except Exception as e:   # re-raised in the training thread by flush/sync/close
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+
+def _save_chunk(directory, chunk):
+    # Named by first episode, so a directory lists in episode order;
+    # written atomically so readers never see half a chunk
+    path = os.path.join(directory, f"chunk_{int(chunk['episode'][0]):09d}.npz")
+    atomic_write(path, lambda f: np.savez(f, **chunk))
+
+
+def chunk_paths(directory):
+    return sorted(glob.glob(os.path.join(directory, "chunk_*.npz")))
+
+
+def read_metrics(directory):
+    """All chunks in directory as {column: array}, ordered by episode."""
+    parts = {name: [] for name in COLUMNS}
+    for path in chunk_paths(directory):
+        with np.load(path) as data:
+            for name in COLUMNS:
+                parts[name].append(data[name])
+    columns = {name: (np.concatenate(arrays) if arrays else np.zeros(0, dtype=COLUMNS[name]))
+               for name, arrays in parts.items()}
+    order = np.argsort(columns["episode"], kind="stable")
+    return {name: column[order] for name, column in columns.items()}
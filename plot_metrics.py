@@ -0,0 +1,63 @@
+# plot_metrics.py
+"""
+Offline plots of metrics written by metrics.MetricsWriter.
+
+    python plot_metrics.py runs/search_agent                     # show
+    python plot_metrics.py runs/a runs/b --window 50 --out curves.png
+"""
+import argparse
+import os
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+from metrics import WON, read_metrics
+
+
+def smooth(values, window):
+    """Moving average (shorter than values by window - 1; unchanged if window <= 1)."""
+    values = np.asarray(values, dtype=np.float64)
+    if window <= 1 or len(values) < window:
+        return values
+    return np.convolve(values, np.ones(window) / window, mode="valid")
+
+
+def plot_runs(directories, window=10, out=None):
+    fig, (ax_reward, ax_win) = plt.subplots(2, 1, figsize=(10, 8), sharex=True)
+    for directory in directories:
+        columns = read_metrics(directory)
+        if len(columns["episode"]) == 0:
+            print(f"{directory}: no metrics yet")
+            continue
+        label = os.path.basename(os.path.normpath(directory))
+        # Each smoothed point sits at the last episode of its window
+        episodes = columns["episode"][len(columns["episode"]) - len(smooth(columns["reward"], window)):]
+        ax_reward.plot(episodes, smooth(columns["reward"], window), label=label)
+        ax_win.plot(episodes, smooth(columns["outcome"] == WON, window), label=label)
+
+    ax_reward.set_title("Search-based Q-learning Pac-Man")
+    ax_reward.set_ylabel(f"Total reward ({window}-episode mean)")
+    ax_win.set_ylabel(f"Win rate ({window}-episode mean)")
+    ax_win.set_xlabel("Episode")
+    for ax in (ax_reward, ax_win):
+        ax.grid(True)
+        ax.legend()
+
+    if out:
+        fig.savefig(out, dpi=120, bbox_inches="tight")
+        print(f"Saved {out}")
+    else:
+        plt.show()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("directories", nargs="+", help="MetricsWriter directories")
+    parser.add_argument("--window", type=int, default=10, help="moving-average window (episodes)")
+    parser.add_argument("--out", metavar="PATH", help="save the figure instead of showing it")
+    args = parser.parse_args(argv)
+    plot_runs(args.directories, window=args.window, out=args.out)
+
+
+if __name__ == "__main__":
+    main()
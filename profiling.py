@@ -0,0 +1,202 @@
+# profiling.py
+"""
+Opt-in instrumentation for training runs.
+
+    profiler = Profiler()
+    rewards = agent.train(num_episodes=200, profile=profiler)
+    print(profiler.flat_profile())
+    profiler.save_json("profile.json")
+
+Nothing is instrumented until a Profiler is attached: attach() puts
+timing wrappers on one env (its map and distance oracle) and agent as
+instance attributes, and swaps the pathfinding functions in
+PATH_FUNCTIONS for timed ones wherever a loaded module has imported
+them; detach() takes them all off again. Code that runs without a
+profiler is untouched. While attached, every env sharing the oracle or
+those functions is counted too.
+
+On layouts small enough for the all-pairs distance oracle, path queries
+are table lookups (oracle_next_step) instead of A* searches; the report
+says so. Times are inclusive: a_star_path calls made from move_ghosts
+count toward both.
+"""
+import json
+import sys
+import time
+from contextlib import nullcontext
+
+from env import pathfinding
+
+# (owner, method, report name) for every wrapped hot spot
+HOOKS = (
+    ("env", "move_ghosts", "move_ghosts"),
+    ("env", "get_observation", "get_observation"),
+    ("map", "remaining_dots", "remaining_dots"),
+    ("agent", "_nearest_dot", "nearest_dot"),
+    ("agent", "_safest_tile", "safest_tile"),
+    ("agent", "update_q", "update_q"),
+    ("agent", "update_q_batch", "update_q_batch"),
+    ("oracle", "next_step", "oracle_next_step"),
+)
+
+# env.pathfinding functions timed under their own names (a_star_path also
+# counts node expansions)
+PATH_FUNCTIONS = ("a_star_path", "next_step_toward", "first_moves", "distance_field")
+
+
+def profiled(profiler, env, agent=None):
+    """profiler.attach(env, agent) as a context manager, or a no-op when profiler is None."""
+    if profiler is None:
+        return nullcontext()
+    return profiler.attach(env, agent)
+
+
+class Profiler:
+    """
+    Counts calls and wall time per hot spot, plus A* node expansions,
+    and closes them into one record per episode (end_episode()).
+    `episodes` holds those records; `totals()` sums them.
+    """
+
+    def __init__(self):
+        self.episodes = []
+        self._attached = []      # (obj, attribute) pairs to remove on detach
+        self._patched = []       # (module, name, original function) to restore on detach
+        self.uses_oracle = None  # set by attach()
+        self._start_episode()
+
+    # -------------------------------
+    # ATTACH / DETACH
+    # -------------------------------
+    def attach(self, env, agent=None):
+        """
+        Instrument env (and agent, if given). Usable as a context manager:
+            with profiler.attach(env, agent):
+                ...
+        """
+        if self._attached or self._patched:
+            raise ValueError("Profiler is already attached; detach() it first")
+
+        oracle = env.map.distance_oracle()
+        self.uses_oracle = oracle is not None
+        owners = {"env": env, "map": env.map, "agent": agent, "oracle": oracle}
+        for owner, method, name in HOOKS:
+            obj = owners[owner]
+            if obj is not None:
+                setattr(obj, method, self._timed(name, getattr(obj, method)))
+                self._attached.append((obj, method))
+
+        for name in PATH_FUNCTIONS:
+            original = getattr(pathfinding, name)
+            wrapper = (self._timed_a_star(original) if name == "a_star_path"
+                       else self._timed(name, original))
+            # Modules that did "from .pathfinding import name" hold their own reference
+            for module in list(sys.modules.values()):
+                if vars(module).get(name) is original:
+                    setattr(module, name, wrapper)
+                    self._patched.append((module, name, original))
+
+        self._t0 = time.perf_counter()   # episode clocks start here
+        return self
+
+    def detach(self):
+        for obj, method in self._attached:
+            delattr(obj, method)
+        self._attached = []
+        for module, name, original in self._patched:
+            setattr(module, name, original)
+        self._patched = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.detach()
+
+    def _timed(self, name, fn):
+        clock = time.perf_counter
+
+        def timed(*args, **kwargs):
+            t0 = clock()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                stat = self._stats.setdefault(name, [0, 0.0])
+                stat[0] += 1
+                stat[1] += clock() - t0
+        return timed
+
+    def _timed_a_star(self, a_star_path):
+        timed = self._timed("a_star_path", a_star_path)
+
+        def a_star(map_obj, *args, **kwargs):
+            graph = map_obj.grid_graph()
+            before = graph.expansions
+            try:
+                return timed(map_obj, *args, **kwargs)
+            finally:
+                self._counters["a_star_expansions"] += graph.expansions - before
+        return a_star
+
+    # -------------------------------
+    # EPISODES
+    # -------------------------------
+    def _start_episode(self):
+        self._stats = {}
+        self._counters = {"a_star_expansions": 0}
+        self._t0 = time.perf_counter()
+
+    def end_episode(self, **fields):
+        """
+        Close the current episode's record and start the next one.
+        Extra fields (e.g. reward=..., steps=...) are stored with it, so
+        profiles line up with the reward curve.
+        """
+        record = dict(fields)
+        record["seconds"] = time.perf_counter() - self._t0
+        record["calls"] = {name: stat[0] for name, stat in self._stats.items()}
+        record["times"] = {name: stat[1] for name, stat in self._stats.items()}
+        record.update(self._counters)
+        self.episodes.append(record)
+        self._start_episode()
+        return record
+
+    def totals(self):
+        """Summed calls, times and counters over all finished episodes."""
+        totals = {"episodes": len(self.episodes), "seconds": 0.0, "calls": {}, "times": {},
+                  "a_star_expansions": 0}
+        for record in self.episodes:
+            totals["seconds"] += record["seconds"]
+            totals["a_star_expansions"] += record["a_star_expansions"]
+            for name, calls in record["calls"].items():
+                totals["calls"][name] = totals["calls"].get(name, 0) + calls
+                totals["times"][name] = totals["times"].get(name, 0.0) + record["times"][name]
+        return totals
+
+    # -------------------------------
+    # EXPORT
+    # -------------------------------
+    def to_dict(self):
+        return {"totals": self.totals(), "uses_oracle": self.uses_oracle,
+                "episodes": self.episodes}
+
+    def save_json(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def flat_profile(self):
+        """Text table, one row per hot spot, slowest first (like a gprof flat profile)."""
+        totals = self.totals()
+        wall = totals["seconds"]
+        lines = [f"{totals['episodes']} episodes, {wall:.3f}s, "
+                 f"{totals['a_star_expansions']} A* node expansions"]
+        if self.uses_oracle:
+            lines.append("distance oracle in use: path queries are table lookups "
+                         "(oracle_next_step), not A* searches")
+        lines += [f"{'name':<18}{'calls':>10}{'total_s':>10}{'per_call_us':>14}{'%_time':>9}"]
+        for name, seconds in sorted(totals["times"].items(), key=lambda item: -item[1]):
+            calls = totals["calls"][name]
+            lines.append(f"{name:<18}{calls:>10}{seconds:>10.3f}"
+                         f"{seconds / calls * 1e6:>14.1f}"
+                         f"{100 * seconds / wall if wall > 0 else 0.0:>9.1f}")
+        return "\n".join(lines)
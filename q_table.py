@@ -0,0 +1,220 @@
+# q_table.py
+import json
+
+import numpy as np
+
+from env.fileio import atomic_write
+
+
+class StateEncoder:
+    """
+    Maps discrete state tuples (one small int per feature) to a flat index
+    in [0, num_states), so Q-values can live in a dense array.
+    """
+
+    def __init__(self, dims):
+        self.dims = tuple(int(d) for d in dims)
+        self.num_states = int(np.prod(self.dims))
+
+    def encode(self, state):
+        idx = 0
+        for value, size in zip(state, self.dims):
+            idx = idx * size + value
+        return idx
+
+    def encode_batch(self, states):
+        """(B, num_features) array of state tuples -> (B,) int64 indices."""
+        states = np.asarray(states, dtype=np.int64).reshape(-1, len(self.dims))
+        return np.ravel_multi_index(states.T, self.dims)
+
+    def decode(self, idx):
+        return tuple(int(v) for v in np.unravel_index(idx, self.dims))
+
+
+class DictQTable:
+    """Original lazily-populated dict[state][action] -> value table."""
+
+    def __init__(self, encoder, actions):
+        self.encoder = encoder
+        self.actions = list(actions)
+        self.table = {}
+
+    def _row(self, state):
+        if state not in self.table:
+            self.table[state] = {a: 0.0 for a in self.actions}
+        return self.table[state]
+
+    def q_values(self, state):
+        row = self._row(state)
+        return [row[a] for a in self.actions]
+
+    def best_action(self, state):
+        q_vals = self._row(state)
+        return max(q_vals, key=q_vals.get)
+
+    def update(self, state, action, reward, next_state, done, alpha, gamma):
+        """TD update of one transition; returns its TD error (target - old value)."""
+        row = self._row(state)
+        if done:
+            target = reward
+        else:
+            target = reward + gamma * max(self._row(next_state).values())
+        td_error = target - row[action]
+        row[action] += alpha * td_error
+        return td_error
+
+    def batch_update(self, states, actions, rewards, next_states, dones, alpha, gamma,
+                     weights=None):
+        """
+        Sequential TD updates over a batch of encoded transitions, each step
+        scaled by its weight if given. Returns the TD errors.
+        """
+        decode = self.encoder.decode
+        if weights is None:
+            weights = np.ones(len(states))
+        td_errors = np.empty(len(states), dtype=np.float64)
+        for i, (s, a, r, s2, d, w) in enumerate(zip(states, actions, rewards,
+                                                   next_states, dones, weights)):
+            td_errors[i] = self.update(decode(s), int(a), float(r), decode(s2), bool(d),
+                                       alpha * w, gamma)
+        return td_errors
+
+    def to_array(self):
+        values = np.zeros((self.encoder.num_states, len(self.actions)), dtype=np.float64)
+        for state, row in self.table.items():
+            values[self.encoder.encode(state)] = [row[a] for a in self.actions]
+        return values
+
+    def set_values(self, values):
+        self.table = {self.encoder.decode(s): {a: float(v) for a, v in zip(self.actions, row)}
+                      for s, row in enumerate(np.asarray(values))}
+
+
+class DenseQTable:
+    """
+    Q-values in a dense (num_states, num_actions) float64 array, addressed
+    through a StateEncoder; actions are the column indices 0..num_actions-1.
+    Every state exists up front (initialized to 0), so memory is fixed by
+    the state schema.
+    """
+
+    def __init__(self, encoder, num_actions):
+        self.encoder = encoder
+        self.actions = list(range(num_actions))
+        self.values = np.zeros((encoder.num_states, num_actions), dtype=np.float64)
+
+    def q_values(self, state):
+        return self.values[self.encoder.encode(state)]
+
+    def best_action(self, state):
+        # argmax takes the first maximum, like max() over the dict backend
+        return int(np.argmax(self.values[self.encoder.encode(state)]))
+
+    def best_actions(self, state_indices):
+        """Greedy action for each encoded state in a batch."""
+        return np.argmax(self.values[state_indices], axis=1)
+
+    def update(self, state, action, reward, next_state, done, alpha, gamma):
+        """TD update of one transition; returns its TD error (target - old value)."""
+        s = self.encoder.encode(state)
+        if done:
+            target = reward
+        else:
+            target = reward + gamma * self.values[self.encoder.encode(next_state)].max()
+        td_error = target - self.values[s, action]
+        self.values[s, action] += alpha * td_error
+        return float(td_error)
+
+    def batch_update(self, states, actions, rewards, next_states, dones, alpha, gamma,
+                     weights=None):
+        """
+        Vectorized TD update over a batch of encoded transitions.
+        All targets are computed from the table before the batch is applied;
+        repeated (state, action) pairs accumulate their updates. `weights`
+        (e.g. importance-sampling weights) scale each transition's step.
+        Returns the TD errors.
+        """
+        states = np.asarray(states, dtype=np.int64)
+        actions = np.asarray(actions, dtype=np.int64)
+        rewards = np.asarray(rewards, dtype=np.float64)
+        dones = np.asarray(dones, dtype=bool)
+
+        max_next = self.values[np.asarray(next_states, dtype=np.int64)].max(axis=1)
+        targets = rewards + gamma * max_next * ~dones
+        td_errors = targets - self.values[states, actions]
+        deltas = alpha * td_errors
+        if weights is not None:
+            deltas *= weights
+        np.add.at(self.values, (states, actions), deltas)
+        return td_errors
+
+    def to_array(self):
+        return self.values
+
+    def set_values(self, values):
+        """Adopt `values` as the table without copying (it may be a read-only memmap)."""
+        if values.shape != self.values.shape:
+            raise ValueError(f"Q-table shape {values.shape} does not match {self.values.shape}")
+        self.values = values
+
+
+def make_q_table(backend, encoder, actions):
+    if backend == "dense":
+        return DenseQTable(encoder, len(actions))
+    if backend == "dict":
+        return DictQTable(encoder, actions)
+    raise ValueError(f"Unknown Q-table backend: {backend!r} (expected 'dense' or 'dict')")
+
+
+# -------------------------------
+# CHECKPOINT FORMAT
+# -------------------------------
+# A table is stored as two files:
+#   <path>       plain .npy of the dense (num_states, num_actions) values,
+#                no pickle, so it can be opened with np.load(mmap_mode=...)
+#   <path>.json  format/version, state schema, hyperparameters and epsilon
+FORMAT_NAME = "pacman-q-table"
+FORMAT_VERSION = 1
+
+
+def metadata_path(path):
+    return path + ".json"
+
+
+def save_q_table(path, values, metadata):
+    """Write dense Q-values and their metadata (values first, then the sidecar)."""
+    values = np.ascontiguousarray(values)
+    meta = {
+        "format": FORMAT_NAME,
+        "version": FORMAT_VERSION,
+        "shape": list(values.shape),
+        "dtype": values.dtype.str,
+        **metadata,
+    }
+    atomic_write(path, lambda f: np.save(f, values, allow_pickle=False))
+    atomic_write(metadata_path(path), lambda f: f.write(json.dumps(meta, indent=2).encode()))
+
+
+def load_q_table(path, mmap_mode=None):
+    """
+    Return (values, metadata) for a table written by save_q_table.
+    With mmap_mode="r" the values are a read-only memmap shared between
+    processes that open the same file.
+    """
+    try:
+        with open(metadata_path(path)) as f:
+            meta = json.load(f)
+    except FileNotFoundError:
+        raise ValueError(f"{path} has no {metadata_path(path)} metadata; "
+                         "it is not a Q-table checkpoint (old pickled tables are not supported)") from None
+
+    if meta.get("format") != FORMAT_NAME:
+        raise ValueError(f"{path} is not a {FORMAT_NAME} checkpoint")
+    if meta.get("version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported Q-table format version {meta.get('version')} "
+                         f"(expected {FORMAT_VERSION})")
+
+    values = np.load(path, mmap_mode=mmap_mode, allow_pickle=False)
+    if list(values.shape) != meta["shape"] or values.dtype.str != meta["dtype"]:
+        raise ValueError(f"{path} does not match its metadata (shape/dtype)")
+    return values, meta
@@ -0,0 +1,198 @@
+# replay_buffer.py
+import numpy as np
+
+
+class ReplayBuffer:
+    """
+    Fixed-capacity ring of transitions (state, action, reward, next_state,
+    done) in preallocated arrays; states are StateEncoder indices. Once
+    full, each new transition overwrites the oldest one.
+    Sampling is uniform; see PrioritizedReplayBuffer for TD-error priorities.
+    """
+
+    def __init__(self, capacity, seed=None):
+        if capacity < 1:
+            raise ValueError(f"capacity must be at least 1, got {capacity}")
+        self.capacity = capacity
+        self.rng = np.random.default_rng(seed)
+
+        # Compact columns: state ids and actions are small ints
+        self.states = np.zeros(capacity, dtype=np.int32)
+        self.actions = np.zeros(capacity, dtype=np.int8)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.next_states = np.zeros(capacity, dtype=np.int32)
+        self.dones = np.zeros(capacity, dtype=bool)
+
+        self.pos = 0     # next slot to write
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def add(self, state, action, reward, next_state, done):
+        """Store one transition; returns its slot."""
+        i = self.pos
+        self.states[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = next_state
+        self.dones[i] = done
+        self._advance(1)
+        return i
+
+    def add_batch(self, states, actions, rewards, next_states, dones):
+        """Store a batch of transitions (e.g. one PacmanVecEnv step); returns their slots."""
+        n = len(states)
+        if n > self.capacity:
+            raise ValueError(f"batch of {n} does not fit in a buffer of {self.capacity}")
+        idx = (self.pos + np.arange(n)) % self.capacity
+        self.states[idx] = states
+        self.actions[idx] = actions
+        self.rewards[idx] = rewards
+        self.next_states[idx] = next_states
+        self.dones[idx] = dones
+        self._advance(n)
+        return idx
+
+    def _advance(self, n):
+        self.pos = (self.pos + n) % self.capacity
+        self.size = min(self.size + n, self.capacity)
+
+    def sample(self, batch_size):
+        """
+        Draw batch_size transitions (with replacement).
+        Returns (idx, states, actions, rewards, next_states, dones, weights);
+        weights is None for uniform sampling.
+        """
+        if self.size == 0:
+            raise ValueError("cannot sample from an empty replay buffer")
+        idx = (self.rng.random(batch_size) * self.size).astype(np.int64)
+        return (idx,) + self._gather(idx) + (None,)
+
+    def _gather(self, idx):
+        return (self.states[idx], self.actions[idx], self.rewards[idx],
+                self.next_states[idx], self.dones[idx])
+
+    def update_priorities(self, idx, td_errors):
+        """Uniform buffers ignore priorities."""
+
+    # Checkpointing (see checkpoints.py)
+    _COLUMNS = ("states", "actions", "rewards", "next_states", "dones")
+
+    def get_state(self):
+        """(arrays, meta) snapshot of the contents, write position and RNG."""
+        arrays = {name: getattr(self, name) for name in self._COLUMNS}
+        meta = {"capacity": self.capacity, "pos": self.pos, "size": self.size,
+                "rng": self.rng.bit_generator.state}
+        return arrays, meta
+
+    def set_state(self, arrays, meta):
+        """Restore a get_state() snapshot taken from a buffer of the same capacity."""
+        if meta["capacity"] != self.capacity:
+            raise ValueError(f"snapshot is of a buffer of {meta['capacity']}, "
+                             f"this one holds {self.capacity}")
+        for name in self._COLUMNS:
+            getattr(self, name)[...] = arrays[name]
+        self.pos = meta["pos"]
+        self.size = meta["size"]
+        self.rng.bit_generator.state = meta["rng"]
+
+
+# -------------------------------
+# PRIORITIZED REPLAY
+# -------------------------------
+class SumTree:
+    """
+    Binary tree over `capacity` non-negative priorities where every node
+    holds the sum of its children, so a priority-proportional draw is one
+    root-to-leaf walk. Node 1 is the root; leaves start at `self.leaves`.
+    Updates and searches work on whole batches, one tree level at a time.
+    """
+
+    def __init__(self, capacity):
+        self.leaves = 1 << max(0, (capacity - 1).bit_length())
+        self.tree = np.zeros(2 * self.leaves, dtype=np.float64)
+
+    def total(self):
+        return float(self.tree[1])
+
+    def get(self, idx):
+        return self.tree[np.asarray(idx) + self.leaves]
+
+    def update(self, idx, priorities):
+        nodes = np.asarray(idx, dtype=np.int64) + self.leaves
+        self.tree[nodes] = priorities
+        nodes = np.unique(nodes // 2)
+        while nodes[0] >= 1:
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+            if nodes[0] == 1:
+                break
+            nodes = np.unique(nodes // 2)
+
+    def find(self, values):
+        """Leaf index whose prefix-sum interval contains each value in [0, total)."""
+        values = np.array(values, dtype=np.float64)
+        nodes = np.ones(len(values), dtype=np.int64)
+        while nodes[0] < self.leaves:
+            left = 2 * nodes
+            left_sum = self.tree[left]
+            go_right = values >= left_sum
+            values -= np.where(go_right, left_sum, 0.0)
+            nodes = left + go_right
+        return nodes - self.leaves
+
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    """
+    Replay buffer that samples transition i with probability p_i^alpha / sum,
+    where p_i = |TD error| + eps (new transitions get the current maximum
+    so they are replayed at least once). sample() also returns importance
+    weights (N * P(i))^-beta, scaled so the largest is 1.
+    """
+
+    def __init__(self, capacity, alpha=0.6, beta=0.4, eps=1e-3, seed=None):
+        super().__init__(capacity, seed=seed)
+        self.alpha = alpha
+        self.beta = beta
+        self.eps = eps
+        self.tree = SumTree(capacity)
+        self.max_priority = 1.0
+
+    def add(self, state, action, reward, next_state, done):
+        i = super().add(state, action, reward, next_state, done)
+        self.tree.update([i], self.max_priority)
+        return i
+
+    def add_batch(self, states, actions, rewards, next_states, dones):
+        idx = super().add_batch(states, actions, rewards, next_states, dones)
+        self.tree.update(idx, self.max_priority)
+        return idx
+
+    def sample(self, batch_size):
+        if self.size == 0:
+            raise ValueError("cannot sample from an empty replay buffer")
+        # One draw per equal slice of the total mass (stratified)
+        total = self.tree.total()
+        bounds = (np.arange(batch_size) + self.rng.random(batch_size)) * (total / batch_size)
+        idx = np.minimum(self.tree.find(np.minimum(bounds, np.nextafter(total, 0))), self.size - 1)
+
+        probs = self.tree.get(idx) / total
+        weights = (self.size * probs) ** -self.beta
+        weights /= weights.max()
+        return (idx,) + self._gather(idx) + (weights,)
+
+    def update_priorities(self, idx, td_errors):
+        priorities = (np.abs(td_errors) + self.eps) ** self.alpha
+        self.tree.update(idx, priorities)
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+
+    def get_state(self):
+        arrays, meta = super().get_state()
+        arrays["priority_tree"] = self.tree.tree
+        meta["max_priority"] = self.max_priority
+        return arrays, meta
+
+    def set_state(self, arrays, meta):
+        super().set_state(arrays, meta)
+        self.tree.tree[...] = arrays["priority_tree"]
+        self.max_priority = meta["max_priority"]
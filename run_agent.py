@@ -1,55 +1,36 @@
 # run_agent.py
+"""
+Watch the trained agent play one episode in the terminal.
+For headless win rates and scores over many episodes use evaluate.py.
+"""
 import time
-from search_agent import SearchRLAgent
+
+import numpy as np
+
 from env.pacman_env import PacmanEnv
+from evaluate import load_agent, play_episode
 
-def main():
-    # Create environment
-    env = PacmanEnv()
-    obs = env.reset()
+Q_TABLE_PATH = "q_table_search_agent.npy"  # match filename from train_search_agent.py
 
-    # Create agent and load learned Q-table
-    agent = SearchRLAgent()
+
+def main():
+    # Greedy agent (no exploration) on the learned Q-table
     try:
-        agent.load("q_table_search_agent.npy")  # match filename from train_search_agent.py
-        print("Loaded Q-table from q_table_search_agent.npy")
+        agent = load_agent(Q_TABLE_PATH)
+        print(f"Loaded Q-table from {Q_TABLE_PATH}")
     except Exception as e:
         print("Could not load Q-table, using fresh agent:", e)
+        agent = load_agent(None)
 
-    # Turn off exploration for evaluation
-    agent.epsilon = 0.0
-
-    total_reward = 0
-    done = False
-    state = agent.get_state(env)
+    env = PacmanEnv(obs_mode="none")
 
     print("----- RL AGENT PLAYING PAC-MAN -----")
     time.sleep(1)
 
-    step_count = 0
-    while not done:
-        env.render()
-        time.sleep(0.2)
-
-        # Choose high-level action greedily (chase vs avoid)
-        high_action = agent.choose_high_level_action(state)
-
-        # Use A* planning to get primitive action
-        primitive_action = agent.plan_with_astar(env, high_action)
-
-        obs, reward, done, _ = env.step(primitive_action)
-        total_reward += reward
-        step_count += 1
-
-        next_state = agent.get_state(env)
-        state = next_state
-
-        if step_count > 500:
-            print("Stopping after 500 steps to avoid infinite loops.")
-            break
+    reward, steps, _, _ = play_episode(agent, env, np.random.SeedSequence(),
+                                       render=True, delay=0.2)
+    print(f"GAME OVER - Total reward: {reward} ({steps} steps)")
 
-    env.render()
-    print("GAME OVER - Total reward:", total_reward)
 
 if __name__ == "__main__":
     main()
@@ -1,8 +1,14 @@
 # search_agent.py
-import random
+import time
+
 import numpy as np
-from env.pacman_env import PacmanEnv
-from env.pathfinding import a_star_path
+from env.pacman_env import MAX_EPISODE_STEPS, PacmanEnv
+from env.pathfinding import FIELD_UNREACHED, next_step_toward
+from checkpoints import latest_checkpoint, load_checkpoint, save_checkpoint
+from env.seeding import seed_sequence, seed_sequence_from_state, seed_sequence_state, spawn_seeds
+from metrics import episode_outcome
+from profiling import profiled
+from q_table import StateEncoder, load_q_table, make_q_table, save_q_table
 
 class SearchRLAgent:
     """
@@ -14,24 +20,33 @@ class SearchRLAgent:
         1 = avoid threat (run away from ghosts)
     """
 
+    # Sizes of the get_state() features: (px_bucket, py_bucket, danger, dots_bucket)
+    STATE_DIMS = (2, 2, 2, 3)
+
     def __init__(self,
                  alpha=0.1,
                  gamma=0.95,
                  epsilon_start=1.0,
                  epsilon_min=0.05,
-                 epsilon_decay=0.995):
+                 epsilon_decay=0.995,
+                 q_backend="dense",
+                 seed=None):
         self.alpha = alpha
         self.gamma = gamma
         self.epsilon = epsilon_start
         self.epsilon_min = epsilon_min
         self.epsilon_decay = epsilon_decay
 
-        # Q-table: dict[state][action] -> value
-        self.Q = {}
+        # Private RNG for exploration and planning fallbacks
+        self.rng = np.random.default_rng(seed)
 
         # Two high-level actions: 0=chase, 1=avoid
         self.high_actions = [0, 1]
 
+        # Q-table backend: "dense" (array indexed by encoded state) or "dict"
+        self.state_encoder = StateEncoder(self.STATE_DIMS)
+        self.Q = make_q_table(q_backend, self.state_encoder, self.high_actions)
+
     # State representation (for Q-learning)
     def get_state(self, env: PacmanEnv):
         """
@@ -72,20 +87,13 @@ class SearchRLAgent:
         state = (px_bucket, py_bucket, danger, dots_bucket)
         return state
 
-    def ensure_state_in_Q(self, state):
-        if state not in self.Q:
-            self.Q[state] = {a: 0.0 for a in self.high_actions}
-
     # Epsilon-greedy over high-level actions
     def choose_high_level_action(self, state):
-        self.ensure_state_in_Q(state)
-
-        if random.random() < self.epsilon:
-            return random.choice(self.high_actions)
+        if self.rng.random() < self.epsilon:
+            return self.high_actions[int(self.rng.random() * len(self.high_actions))]
         else:
             # Argmax over actions
-            q_vals = self.Q[state]
-            return max(q_vals, key=q_vals.get)
+            return self.Q.best_action(state)
 
     # High-level action -> low-level primitive action via A*
     def plan_with_astar(self, env: PacmanEnv, high_action):
@@ -97,70 +105,52 @@ class SearchRLAgent:
 
         # Goal selection based on high-level action
         if high_action == 0:
-            # Chase reward: choose nearest dot as goal
-            goal = self._nearest_dot(env, start)
+            # Chase reward: nearest dot by maze distance, and the first move toward it
+            goal, next_pos = self._nearest_dot(env, start)
         else:
             # Avoid threat: choose safest tile (farthest from ghosts)
             goal = self._safest_tile(env)
+            next_pos = next_step_toward(env.map, start, goal) if goal is not None else None
 
-        # If no valid goal, fall back to random valid primitive action
-        if goal is None:
-            valid_acts = env.get_valid_actions()
-            return random.choice(valid_acts) if valid_acts else 0
+        # If no valid goal, no path, or we are already at the goal,
+        # fall back to random valid primitive action
+        if goal is None or next_pos is None:
+            return self._random_valid_action(env)
 
-        path = a_star_path(env.map, start, goal)
-
-        # If A* fails or returns only the start node, choose random valid action
-        if not path or len(path) < 2:
-            valid_acts = env.get_valid_actions()
-            return random.choice(valid_acts) if valid_acts else 0
-
-        # Next cell on the A* path
-        next_pos = path[1]
         primitive_action = self._pos_to_action(env, start, next_pos)
         if primitive_action is None:
             # fallback again in weird cases
-            valid_acts = env.get_valid_actions()
-            return random.choice(valid_acts) if valid_acts else 0
+            return self._random_valid_action(env)
 
         return primitive_action
 
-    def _nearest_dot(self, env: PacmanEnv, start):
-        """Return coordinates of the nearest dot to 'start', or None if none."""
-        sx, sy = start
-        best_dist = None
-        best_pos = None
-
-        for y in range(env.map.height):
-            for x in range(env.map.width):
-                if env.map.grid[y][x] == 2:  # dot
-                    d = abs(sx - x) + abs(sy - y)
-                    if best_dist is None or d < best_dist:
-                        best_dist = d
-                        best_pos = (x, y)
+    def _random_valid_action(self, env: PacmanEnv):
+        valid_acts = env.get_valid_actions()
+        return valid_acts[int(self.rng.random() * len(valid_acts))] if valid_acts else 0
 
-        return best_pos
+    def _nearest_dot(self, env: PacmanEnv, start):
+        """
+        Return (dot, next_pos): the nearest dot (by maze distance) to 'start'
+        and the first tile toward it (see DotDistanceField.nearest).
+        """
+        return env.map.dot_field().nearest(start)
 
     def _safest_tile(self, env: PacmanEnv):
-        """Return tile that maximizes distance to the closest ghost."""
-        ghosts = env.get_ghost_positions()
-        if not ghosts:
+        """Return reachable tile that maximizes maze distance to the closest ghost."""
+        if not env.get_ghost_positions():
             return None
 
-        best_score = None
-        best_pos = None
-
-        for y in range(env.map.height):
-            for x in range(env.map.width):
-                if env.map.is_wall(x, y):
-                    continue
-                # compute distance to the closest ghost
-                min_d = min(abs(x - gx) + abs(y - gy) for gx, gy in ghosts)
-                if best_score is None or min_d > best_score:
-                    best_score = min_d
-                    best_pos = (x, y)
+        danger = env.danger_field()
+        # Pac-Man never leaves its start component, so that is what it can reach;
+        # tiles no ghost can reach have no real distance to maximize
+        candidates = env.map.playable_mask() & (danger != FIELD_UNREACHED)
 
-        return best_pos
+        # argmax keeps the old row-major tie-break (first best tile wins)
+        scores = np.where(candidates, danger, -1)
+        best = int(np.argmax(scores))
+        if scores.flat[best] < 0:
+            return None
+        return (best % env.map.width, best // env.map.width)
 
     def _pos_to_action(self, env: PacmanEnv, start, next_pos):
         """Convert step from start -> next_pos into action index 0..3."""
@@ -175,78 +165,232 @@ class SearchRLAgent:
 
     # Q-learning update
     def update_q(self, state, action, reward, next_state, done):
-        self.ensure_state_in_Q(state)
-        self.ensure_state_in_Q(next_state)
-
-        q_sa = self.Q[state][action]
-        if done:
-            target = reward
-        else:
-            max_next = max(self.Q[next_state].values())
-            target = reward + self.gamma * max_next
-
-        self.Q[state][action] = q_sa + self.alpha * (target - q_sa)
+        self.Q.update(state, action, reward, next_state, done, self.alpha, self.gamma)
 
-    # Training loop
-    def train(self, num_episodes=200, ghost_mode="mixed"):
+    def update_q_batch(self, states, actions, rewards, next_states, dones, weights=None):
         """
-        Train the search-based RL agent in PacmanEnv.
-        Returns list of total rewards per episode (for plotting).
+        Batched Q-learning update; states are encoded indices (see get_state_indices).
+        Returns the TD errors.
         """
-        rewards_per_episode = []
-
-        for ep in range(num_episodes):
-            env = PacmanEnv(ghost_mode=ghost_mode)
-            obs = env.reset()
-            total_reward = 0
-            done = False
-
-            state = self.get_state(env)
-
-            step_count = 0
+        return self.Q.batch_update(states, actions, rewards, next_states, dones,
+                                   self.alpha, self.gamma, weights=weights)
 
-            while not done:
-                # High-level decision
-                high_action = self.choose_high_level_action(state)
+    def replay(self, buffer, batch_size=32):
+        """One batched update from a (prioritized) replay buffer; returns the TD errors."""
+        idx, states, actions, rewards, next_states, dones, weights = buffer.sample(batch_size)
+        td_errors = self.update_q_batch(states, actions, rewards, next_states, dones, weights)
+        buffer.update_priorities(idx, td_errors)
+        return td_errors
 
-                # Plan via A* to get primitive action (up/down/left/right)
-                primitive_action = self.plan_with_astar(env, high_action)
+    def get_state_indices(self, vec_env):
+        """Encoded get_state() features for every game of a PacmanVecEnv, as an (N,) array."""
+        pacman = vec_env.get_pacman_positions()
+        ghosts = vec_env.get_ghost_positions()
 
-                # Step environment
-                obs, reward, done, _ = env.step(primitive_action)
-                total_reward += reward
-                step_count += 1
+        manhattan = np.abs(ghosts - pacman[:, None, :]).sum(axis=2)
+        danger = (manhattan <= 2).any(axis=1).astype(np.int64)
 
-                next_state = self.get_state(env)
+        dots_left = vec_env.remaining_dots()
+        dots_bucket = np.where(dots_left > 30, 2, np.where(dots_left > 10, 1, 0))
 
-                # Q-learning update on HIGH-LEVEL action
-                self.update_q(state, high_action, reward, next_state, done)
+        px_bucket = (pacman[:, 0] >= vec_env.width // 2).astype(np.int64)
+        py_bucket = (pacman[:, 1] >= vec_env.height // 2).astype(np.int64)
 
-                state = next_state
+        return self.state_encoder.encode_batch(
+            np.stack([px_bucket, py_bucket, danger, dots_bucket], axis=1))
 
-                # Safety stop in case of weird loops
-                if step_count > 500:
-                    break
-
-            rewards_per_episode.append(total_reward)
-
-            # Decay epsilon
-            if self.epsilon > self.epsilon_min:
-                self.epsilon *= self.epsilon_decay
-
-            print(f"Episode {ep+1}/{num_episodes} - Total reward: {total_reward:.1f}, epsilon={self.epsilon:.3f}")
+    # Training loop
+    def train(self, num_episodes=200, ghost_mode="mixed", verbose=True, seed=None,
+              max_steps=MAX_EPISODE_STEPS, replay_buffer=None, replay_batch_size=32,
+              profile=None, metrics=None, print_every=1,
+              checkpoint_dir=None, checkpoint_every=50, resume=False,
+              num_ghosts=1, layout=None):
+        """
+        Train the search-based RL agent in PacmanEnv (num_ghosts ghosts on
+        `layout`, default the arcade board; see PacmanEnv).
+        Episode i runs on an env seeded with spawn_seeds(seed, num_episodes)[i]
+        and is cut off (truncated) after max_steps steps.
+        With a replay_buffer (see replay_buffer.py) every transition is also
+        stored there, and each step adds one batched update from it once it
+        holds replay_batch_size transitions.
+        With a profile (profiling.Profiler) the run's hot spots are timed
+        and closed into one record per episode, next to its reward.
+        With metrics (metrics.MetricsWriter) every episode's reward, steps,
+        epsilon, wall time, dots eaten and outcome are logged there.
+        verbose prints a progress line every print_every episodes.
+        With a checkpoint_dir a checkpoint (see save_checkpoint) is written
+        every checkpoint_every episodes and after the last one; resume=True
+        continues from the newest checkpoint there, if any, with the seed
+        it was started with, and drops metrics logged after it.
+        Returns list of total rewards per episode (for plotting), including
+        episodes run before a resume.
+        """
+        encode = self.state_encoder.encode
+        rewards_per_episode = []
+        root_seed = seed_sequence(seed)
+        start = 0
+        if resume and checkpoint_dir is not None:
+            path = latest_checkpoint(checkpoint_dir)
+            if path is not None:
+                start, root_seed, rewards_per_episode = self.load_checkpoint(path, replay_buffer)
+                if metrics is not None:
+                    metrics.truncate(start)
+                if verbose:
+                    print(f"Resuming from {path} after episode {start}")
+        seed_state = seed_sequence_state(root_seed)
+        env_seeds = spawn_seeds(root_seed, num_episodes)
+
+        # One env for the whole run; reset() just restores the board
+        env = PacmanEnv(ghost_mode=ghost_mode, num_ghosts=num_ghosts, layout=layout,
+                        obs_mode="none")
+
+        with profiled(profile, env, self):
+            for ep in range(start, num_episodes):
+                obs = env.reset(seed=env_seeds[ep])
+                total_reward = 0
+                done = False
+                if metrics is not None:
+                    t0 = time.perf_counter()
+                    dots_start = env.map.remaining_dots()
+
+                state = self.get_state(env)
+
+                step_count = 0
+
+                while not done:
+                    # High-level decision
+                    high_action = self.choose_high_level_action(state)
+
+                    # Plan via A* to get primitive action (up/down/left/right)
+                    primitive_action = self.plan_with_astar(env, high_action)
+
+                    # Step environment (the agent reads positions, not the grid)
+                    _, reward, done, _ = env.step(primitive_action, observe=False)
+                    total_reward += reward
+                    step_count += 1
+
+                    next_state = self.get_state(env)
+
+                    # Q-learning update on HIGH-LEVEL action
+                    self.update_q(state, high_action, reward, next_state, done)
+
+                    # Experience replay: keep the transition and learn from old ones
+                    if replay_buffer is not None:
+                        replay_buffer.add(encode(state), high_action, reward, encode(next_state), done)
+                        if len(replay_buffer) >= replay_batch_size:
+                            self.replay(replay_buffer, replay_batch_size)
+
+                    state = next_state
+
+                    # Safety stop in case of weird loops
+                    if step_count >= max_steps:
+                        break
+
+                rewards_per_episode.append(total_reward)
+                if profile is not None:
+                    profile.end_episode(reward=total_reward, steps=step_count)
+                if metrics is not None:
+                    metrics.log(ep, total_reward, step_count, self.epsilon,
+                                time.perf_counter() - t0,
+                                dots_start - env.map.remaining_dots(),
+                                episode_outcome(env, done))
+
+                # Decay epsilon
+                if self.epsilon > self.epsilon_min:
+                    self.epsilon *= self.epsilon_decay
+
+                if verbose and (ep + 1) % print_every == 0:
+                    print(f"Episode {ep+1}/{num_episodes} - Total reward: {total_reward:.1f}, epsilon={self.epsilon:.3f}")
+
+                if checkpoint_dir is not None and ((ep + 1) % checkpoint_every == 0
+                                                   or ep + 1 == num_episodes):
+                    # Metrics first, so a checkpoint never points past what is on disk
+                    if metrics is not None:
+                        metrics.sync()
+                    self.save_checkpoint(checkpoint_dir, ep + 1, seed_state,
+                                         rewards_per_episode, replay_buffer)
 
         return rewards_per_episode
 
     # Save / load Q-table
     def save(self, path="q_table.npy"):
-        # Save as (keys, values) arrays
-        keys = np.array(list(self.Q.keys()), dtype=object)
-        vals = np.array([self.Q[k] for k in keys], dtype=object)
-        np.save(path, (keys, vals), allow_pickle=True)
-
-    def load(self, path="q_table.npy"):
-        keys, vals = np.load(path, allow_pickle=True)
-        self.Q = {}
-        for k, v in zip(keys, vals):
-            self.Q[tuple(k)] = dict(v)
+        """Write the Q-values as a plain .npy plus a JSON sidecar (see q_table.save_q_table)."""
+        save_q_table(path, self.Q.to_array(), {
+            "state_dims": list(self.STATE_DIMS),
+            "actions": list(self.high_actions),
+            "epsilon": self.epsilon,
+            "hyperparameters": {
+                "alpha": self.alpha,
+                "gamma": self.gamma,
+                "epsilon_min": self.epsilon_min,
+                "epsilon_decay": self.epsilon_decay,
+            },
+        })
+
+    # Training checkpoints (see checkpoints.py)
+    def save_checkpoint(self, directory, episode, seed_state, rewards, replay_buffer=None):
+        """
+        Atomically write everything train() needs to continue after `episode`
+        episodes: Q-values, epsilon and hyperparameters, the exploration RNG
+        state, the run's seed tree, rewards so far and the replay buffer.
+        """
+        arrays = {"q_values": self.Q.to_array(),
+                  "rewards": np.asarray(rewards, dtype=np.float64)}
+        state = {
+            "state_dims": list(self.STATE_DIMS),
+            "actions": list(self.high_actions),
+            "epsilon": self.epsilon,
+            "hyperparameters": {
+                "alpha": self.alpha,
+                "gamma": self.gamma,
+                "epsilon_min": self.epsilon_min,
+                "epsilon_decay": self.epsilon_decay,
+            },
+            "rng": self.rng.bit_generator.state,
+            "seed": seed_state,
+            "replay": None,
+        }
+        if replay_buffer is not None:
+            replay_arrays, state["replay"] = replay_buffer.get_state()
+            arrays.update({f"replay_{name}": array for name, array in replay_arrays.items()})
+        return save_checkpoint(directory, episode, arrays, state)
+
+    def load_checkpoint(self, path, replay_buffer=None):
+        """
+        Restore a save_checkpoint() file into this agent (and replay_buffer).
+        Returns (episodes done, the run's root SeedSequence, rewards so far).
+        """
+        arrays, state = load_checkpoint(path)
+        if tuple(state["state_dims"]) != self.STATE_DIMS or state["actions"] != self.high_actions:
+            raise ValueError(f"{path} was saved with state dims {state['state_dims']} and actions "
+                             f"{state['actions']}, expected {list(self.STATE_DIMS)} and {self.high_actions}")
+        if (state["replay"] is None) != (replay_buffer is None):
+            raise ValueError(f"{path} was saved {'without' if state['replay'] is None else 'with'} "
+                             "a replay buffer; resume the same way")
+
+        self.Q.set_values(arrays["q_values"])
+        self.epsilon = state["epsilon"]
+        for name, value in state["hyperparameters"].items():
+            setattr(self, name, value)
+        self.rng.bit_generator.state = state["rng"]
+        if replay_buffer is not None:
+            prefix = "replay_"
+            replay_buffer.set_state({name[len(prefix):]: array for name, array in arrays.items()
+                                     if name.startswith(prefix)}, state["replay"])
+        return (state["episode"], seed_sequence_from_state(state["seed"]),
+                arrays["rewards"].tolist())
+
+    def load(self, path="q_table.npy", mmap_mode=None):
+        """
+        Load a table written by save(). Pass mmap_mode="r" to share one
+        read-only table between evaluator processes without copying it.
+        """
+        values, meta = load_q_table(path, mmap_mode=mmap_mode)
+        if tuple(meta["state_dims"]) != self.STATE_DIMS or meta["actions"] != self.high_actions:
+            raise ValueError(f"{path} was saved with state dims {meta['state_dims']} and actions "
+                             f"{meta['actions']}, expected {list(self.STATE_DIMS)} and {self.high_actions}")
+
+        self.Q.set_values(values)
+        self.epsilon = meta["epsilon"]
+        for name, value in meta["hyperparameters"].items():
+            setattr(self, name, value)
@@ -0,0 +1,32 @@
+import os
+
+import numpy as np
+import pytest
+
+from checkpoints import checkpoint_path
+from replay_buffer import ReplayBuffer
+from search_agent import SearchRLAgent
+
+
+def _train(directory, num_episodes, resume=False, replay=False):
+    agent = SearchRLAgent(seed=0)
+    buffer = ReplayBuffer(500, seed=0) if replay else None
+    rewards = agent.train(num_episodes=num_episodes, verbose=False, seed=7,
+                          replay_buffer=buffer, replay_batch_size=8,
+                          checkpoint_dir=str(directory), checkpoint_every=2, resume=resume)
+    return agent, rewards
+
+
+@pytest.mark.parametrize("replay", [False, True])
+def test_resumed_run_matches_uninterrupted_run(tmp_path, replay):
+    full, full_rewards = _train(tmp_path / "full", 6, replay=replay)
+
+    # Stop after 5 episodes and lose the last checkpoint, as if killed mid-save
+    cut = tmp_path / "cut"
+    _train(cut, 5, replay=replay)
+    os.remove(checkpoint_path(str(cut), 5))
+    resumed, resumed_rewards = _train(cut, 6, resume=True, replay=replay)
+
+    assert resumed_rewards == full_rewards
+    assert np.array_equal(resumed.Q.to_array(), full.Q.to_array())
+    assert resumed.epsilon == full.epsilon
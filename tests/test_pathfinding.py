@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from env.game_map import GameMap
+from env.mazes import generate_maze
+from env.pathfinding import (FIELD_UNREACHED, DistanceOracle, a_star_path, distance_field,
+                             first_moves, get_neighbors)
+
+
+def _open_cells(map_obj):
+    return [(x, y) for y in range(map_obj.height) for x in range(map_obj.width)
+            if not map_obj.is_wall(x, y)]
+
+
+def _map_without_oracle(layout=None):
+    map_obj = GameMap(layout)
+    map_obj._oracle = None
+    map_obj._oracle_built = True
+    return map_obj
+
+
+@pytest.fixture(params=["arcade", "maze"])
+def layout(request):
+    return None if request.param == "arcade" else generate_maze(31, 21, seed=3)
+
+
+def test_oracle_steps_to_first_closer_neighbour(layout):
+    map_obj = GameMap(layout)
+    oracle = map_obj.distance_oracle()
+    cells = _open_cells(map_obj)
+    rng = np.random.default_rng(0)
+    for a, b in rng.integers(len(cells), size=(2000, 2)):
+        start, goal = cells[a], cells[b]
+        path = a_star_path(map_obj, start, goal)
+        step = oracle.next_step(start, goal)
+        if path is None or start == goal:
+            assert step is None
+            continue
+        d = oracle.distance(start, goal)
+        assert d == len(path) - 1
+        closer = [n for n in get_neighbors(map_obj, start) if oracle.distance(n, goal) == d - 1]
+        assert step == closer[0]
+
+
+def test_first_moves_agrees_with_and_without_oracle(layout):
+    with_oracle = GameMap(layout)
+    without = _map_without_oracle(layout)
+    assert with_oracle.distance_oracle() is not None
+
+    cells = np.array(_open_cells(with_oracle))
+    rng = np.random.default_rng(1)
+    starts = cells[rng.integers(len(cells), size=1000)]
+    goals = cells[rng.integers(len(cells), size=1000)]
+    goals[:300] = goals[0]   # many queries sharing one goal
+
+    moves_a, dists_a = first_moves(with_oracle, starts, goals)
+    moves_b, dists_b = first_moves(without, starts, goals)
+    assert (moves_a == moves_b).all()
+    assert (dists_a == dists_b).all()
+
+
+def test_distance_field_matches_oracle():
+    with_oracle = GameMap()
+    without = _map_without_oracle()
+    sources = [(1, 1), (26, 29), (0, 0)]
+    field = distance_field(without, sources)
+    assert (field == distance_field(with_oracle, sources)).all()
+    # Walls read -1; the arcade board has open cells cut off from every source
+    assert (field[with_oracle.grid == 1] == -1).all()
+    assert (field == FIELD_UNREACHED).any()
+
+
+def test_dot_field_repair_matches_fresh_bfs():
+    map_obj = GameMap()
+    field = map_obj.dot_field()
+    rng = np.random.default_rng(2)
+    dots = sorted(map_obj.dots)
+    for k in rng.permutation(len(dots))[:150]:
+        map_obj.eat_dot(*dots[k])
+        expected = distance_field(map_obj, map_obj.dots).ravel()
+        reached = (expected >= 0) & (expected != FIELD_UNREACHED)
+        assert (np.array(field.dist)[reached] == expected[reached]).all()
+        assert (np.array(field.dist)[~reached & (map_obj.grid.ravel() != 1)]
+                == field.INF).all()
+
+
+def test_oracle_is_built_eagerly():
+    oracle = DistanceOracle(GameMap())
+    reachable = oracle.dist != DistanceOracle.UNREACHABLE
+    assert (oracle.next_hop[reachable] >= 0).all()
+    assert (oracle.next_hop[~reachable] == -1).all()
@@ -0,0 +1,24 @@
+import numpy as np
+
+from env.pacman_env import PacmanEnv
+from env.pathfinding import next_step_toward
+from search_agent import SearchRLAgent
+
+
+def test_avoid_goal_is_reachable_on_arcade_board():
+    """The avoid-mode goal must be a tile Pac-Man can actually walk to."""
+    env = PacmanEnv(seed=0)
+    env.reset()
+    agent = SearchRLAgent(seed=0)
+    rng = np.random.default_rng(0)
+
+    for _ in range(300):
+        start = env.get_pacman_position()
+        goal = agent._safest_tile(env)
+        assert goal is not None
+        assert goal == start or next_step_toward(env.map, start, goal) is not None
+
+        valid = env.get_valid_actions()
+        _, _, done, _ = env.step(valid[rng.integers(len(valid))], observe=False)
+        if done:
+            env.reset()
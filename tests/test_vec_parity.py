@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from env.mazes import generate_maze
+from env.pacman_env import PacmanEnv
+from env.pathfinding import MAX_ORACLE_CELLS
+from env.seeding import spawn_seeds
+from env.vec_env import PacmanVecEnv
+
+NUM_GAMES = 4
+
+
+def _assert_same_games(steps, obs_mode="grid", **env_kwargs):
+    """Game i of a PacmanVecEnv must replay exactly like PacmanEnv(seed=spawn_seeds(seed, N)[i])."""
+    vec = PacmanVecEnv(NUM_GAMES, seed=123, obs_mode=obs_mode, **env_kwargs)
+    envs = [PacmanEnv(seed=s, obs_mode=obs_mode, **env_kwargs)
+            for s in spawn_seeds(123, NUM_GAMES)]
+    vec_obs = vec.reset()
+    for i, env in enumerate(envs):
+        obs = env.reset()
+        if obs_mode != "none":
+            assert (obs == vec_obs[i]).all()
+
+    rng = np.random.default_rng(0)
+    for t in range(steps):
+        actions = rng.integers(4, size=NUM_GAMES)
+        vec_obs, rewards, dones, info = vec.step(actions)
+        for i, env in enumerate(envs):
+            obs, reward, done, _ = env.step(int(actions[i]))
+            assert (reward, done) == (rewards[i], dones[i]), (t, i)
+            if done:
+                k = list(info["final_index"]).index(i)
+                if obs_mode != "none":
+                    assert (info["final_observation"][k] == obs).all(), (t, i)
+                obs = env.reset()
+            assert (env.ghost_pos == vec.ghosts[i]).all(), (t, i)
+            assert env.get_pacman_position() == tuple(vec.pacman[i].tolist()), (t, i)
+            if obs_mode != "none":
+                assert (obs == vec_obs[i]).all(), (t, i)
+
+
+@pytest.mark.parametrize("ghost_mode", ["mixed", "chase", "scatter"])
+@pytest.mark.parametrize("num_ghosts", [1, 4])
+def test_vec_env_matches_pacman_env_on_arcade_board(num_ghosts, ghost_mode):
+    _assert_same_games(400, num_ghosts=num_ghosts, ghost_mode=ghost_mode)
+
+
+def test_vec_env_matches_pacman_env_without_oracle():
+    """A board too big for the distance oracle routes ghosts through the planners."""
+    layout = generate_maze(121, 81, seed=0)
+    assert np.count_nonzero(layout.grid != 1) > MAX_ORACLE_CELLS
+    _assert_same_games(200, obs_mode="none", num_ghosts=4, ghost_mode="mixed", layout=layout)
@@ -1,16 +1,56 @@
 # train_search_agent.py
+"""
+Train the search-based Q-learning agent, checkpointing as it goes.
+
+    python train_search_agent.py                 # fresh 200-episode run
+    python train_search_agent.py --resume        # continue from the latest checkpoint
+    python train_search_agent.py --num-ghosts 4 --layout my_maze.txt
+"""
+import argparse
+import os
+
+from checkpoints import list_checkpoints
+from env.mazes import load_layout
+from metrics import MetricsWriter
 from search_agent import SearchRLAgent
-import matplotlib.pyplot as plt
 
-agent = SearchRLAgent()
-rewards = agent.train(num_episodes=200, ghost_mode="mixed")
+METRICS_DIR = "metrics/search_agent"
+CHECKPOINT_DIR = "checkpoints/search_agent"
+Q_TABLE_PATH = "q_table_search_agent.npy"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--episodes", type=int, default=200, help="total episodes of the run")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--resume", action="store_true",
+                        help=f"continue from the newest checkpoint in {CHECKPOINT_DIR}")
+    parser.add_argument("--checkpoint-every", type=int, default=50, metavar="N",
+                        help="episodes between checkpoints")
+    parser.add_argument("--num-ghosts", type=int, default=1, choices=(1, 2, 3, 4))
+    parser.add_argument("--layout", metavar="PATH",
+                        help="maze file (see env/mazes.py); default: the arcade board")
+    args = parser.parse_args(argv)
+    layout = load_layout(args.layout) if args.layout else None
+
+    agent = SearchRLAgent()
+
+    # Per-episode metrics go to disk in chunks; plot them with
+    #     python plot_metrics.py metrics/search_agent
+    with MetricsWriter(METRICS_DIR) as metrics:
+        if not args.resume:
+            # A fresh run replaces the previous run's checkpoints and metrics
+            for path in list_checkpoints(CHECKPOINT_DIR):
+                os.remove(path)
+            metrics.truncate(0)
+        agent.train(num_episodes=args.episodes, ghost_mode="mixed", seed=args.seed,
+                    metrics=metrics, print_every=20,
+                    checkpoint_dir=CHECKPOINT_DIR, checkpoint_every=args.checkpoint_every,
+                    resume=args.resume, num_ghosts=args.num_ghosts, layout=layout)
+
+    agent.save(Q_TABLE_PATH)
+    print(f"Saved {Q_TABLE_PATH}; metrics in {METRICS_DIR} (python plot_metrics.py {METRICS_DIR})")
 
-# Plot learning curve
-plt.plot(rewards)
-plt.xlabel("Episode")
-plt.ylabel("Total Reward")
-plt.title("Search-based Q-learning Pac-Man")
-plt.show()
 
-# Optionally save Q-table
-agent.save("q_table_search_agent.npy")
+if __name__ == "__main__":
+    main()